@@ -0,0 +1,23 @@
+"""Optional Numba support for the backtesting scripts.
+
+`njit` is `numba.njit` when numba is installed. Otherwise it is a no-op
+decorator, so the same kernels still run (slower) as plain Python.
+
+Install with:
+    pip install numba
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except Exception:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        # support both the bare @njit form and @njit(cache=True, ...)
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
@@ -0,0 +1,28 @@
+"""Optional Parquet cache for the backtesting CSV loaders.
+
+`cached_read(path, parse, version)` returns `parse(path)` and saves the result next
+to the CSV as `<path>.parquet`. Later calls load that file instead, as long as the
+CSV, `version` and the parser are unchanged, which skips the CSV date parsing
+entirely. The cache itself is the project-level parquet_mirror module, shared with
+bitcoin-trader.py.
+
+Needs a Parquet engine:
+    pip install pyarrow
+
+Without one (or when the cache cannot be written) the CSV is parsed every time.
+"""
+
+import os
+import sys
+
+# parquet_mirror lives in the project root; append (not insert) so the root's local
+# `discord/` package never shadows an installed one
+_PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJ_ROOT not in sys.path:
+    sys.path.append(_PROJ_ROOT)
+
+from parquet_mirror import mirrored_read
+
+
+def cached_read(path, parse, version=1):
+    return mirrored_read(path, parse, version, compression='snappy')
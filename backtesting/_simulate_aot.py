@@ -0,0 +1,44 @@
+"""Ahead-of-time build of the vectorbt_backtest simulation kernel.
+
+Compiles `_simulate` with numba.pycc into a `threebar_sim` extension module
+next to this file, so vectorbt_backtest.py can skip the JIT warmup on a
+cold start. vectorbt_backtest imports it automatically when present and
+otherwise falls back to the @njit kernel (or the NumPy one without numba).
+
+Build (from the backtesting/ directory; needs numba and a C compiler):
+    python _simulate_aot.py
+
+The build records a hash of the `_simulate`/`_find_exit` source
+(vectorbt_backtest.kernel_source_hash); after either changes, vectorbt_backtest
+ignores the stale module and uses the JIT kernel until it is rebuilt.
+"""
+
+import os
+
+from numba.pycc import CC
+
+import vectorbt_backtest
+
+cc = CC('threebar_sim')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# same argument and return layout as vectorbt_backtest._simulate; inputs are the
+# C-contiguous columns built in _run_sim_ohlc
+cc.export(
+    'simulate',
+    'Tuple((i8[::1], i8[::1], i8[::1], f8[::1], f8[::1], i1[::1]))'
+    '(f8[::1], f8[::1], f8[::1], i8[::1], f8[::1], f8[::1], f8[::1], b1)',
+)(vectorbt_backtest._simulate.py_func)
+
+# the kernel source this build was made from, checked by vectorbt_backtest on import
+_KERNEL_HASH = vectorbt_backtest.kernel_source_hash()
+
+
+@cc.export('kernel_hash', 'i8()')
+def kernel_hash():
+    return _KERNEL_HASH
+
+
+if __name__ == '__main__':
+    cc.compile()
+    print('Built threebar_sim in', cc.output_dir)
@@ -1,10 +1,12 @@
 import backtrader as bt
 import argparse
+import pandas as pd
 
 class ThreeBarGapBTC(bt.Strategy):
     params = dict(
         risk_pct=0.01,     # optional: risk per trade (position sizing stub)
         use_market_entry=False,  # use market order on next bar instead of Stop
+        debug=False,       # log every signal / order / trade event (slow on long runs)
     )
 
     def __init__(self):
@@ -69,7 +71,8 @@ class ThreeBarGapBTC(bt.Strategy):
             self.sl_price = low3   # stop: below bar3
 
             # entry as STOP at bar3 high; may trigger on future bars
-            self.log(f'SIGNAL: gap long; entry stop={high3:.2f}, tp={self.tp_price:.2f}, sl={self.sl_price:.2f}')
+            if self.p.debug:
+                self.log(f'SIGNAL: gap long; entry stop={high3:.2f}, tp={self.tp_price:.2f}, sl={self.sl_price:.2f}')
             # count this as a generated signal
             self.signals_detected += 1
             # record signal details
@@ -86,16 +89,21 @@ class ThreeBarGapBTC(bt.Strategy):
                 )
 
     def notify_order(self, order):
-        # log only useful order events
-        st = order.getstatusname()
-        self.log(f'ORDER event: id={getattr(order, "ref", None)} status={st} type={order.getordername()} price={getattr(order, "price", None)}')
+        # submitted/accepted events only matter for the debug log
+        if order.status in [order.Submitted, order.Accepted] and not self.p.debug:
+            return
+
+        if self.p.debug:
+            st = order.getstatusname()
+            self.log(f'ORDER event: id={getattr(order, "ref", None)} status={st} type={order.getordername()} price={getattr(order, "price", None)}')
 
         if order.status in [order.Submitted, order.Accepted]:
             return
 
         # entry filled (match by order ref instead of object identity)
         if getattr(order, 'ref', None) == getattr(self.entry_ord, 'ref', None) and order.status == order.Completed:
-            self.log(f'ENTRY FILLED @ {order.executed.price:.2f}')
+            if self.p.debug:
+                self.log(f'ENTRY FILLED @ {order.executed.price:.2f}')
 
             # send bracket-like exits manually: TP (limit) and SL (stop)
             self.tp_ord = self.sell(
@@ -109,7 +117,8 @@ class ThreeBarGapBTC(bt.Strategy):
 
         # entry cancelled / rejected
         if getattr(order, 'ref', None) == getattr(self.entry_ord, 'ref', None) and order.status in [order.Canceled, order.Rejected]:
-            self.log('ENTRY CANCELLED / REJECTED')
+            if self.p.debug:
+                self.log('ENTRY CANCELLED / REJECTED')
             self.entry_ord = None
 
         # exits filled: when one hits, cancel the other
@@ -119,8 +128,9 @@ class ThreeBarGapBTC(bt.Strategy):
         sl_ref = getattr(self.sl_ord, 'ref', None)
 
         if order_ref in [tp_ref, sl_ref] and order.status == order.Completed:
-            side = 'TP' if order_ref == tp_ref else 'SL'
-            self.log(f'{side} FILLED @ {order.executed.price:.2f}')
+            if self.p.debug:
+                side = 'TP' if order_ref == tp_ref else 'SL'
+                self.log(f'{side} FILLED @ {order.executed.price:.2f}')
             self.cancel_exits()
             self.entry_ord = None
 
@@ -134,7 +144,8 @@ class ThreeBarGapBTC(bt.Strategy):
 
     def notify_trade(self, trade):
         if trade.isclosed:
-            self.log(f'TRADE PnL: gross={trade.pnl:.2f}, net={trade.pnlcomm:.2f}')
+            if self.p.debug:
+                self.log(f'TRADE PnL: gross={trade.pnl:.2f}, net={trade.pnlcomm:.2f}')
             # update counters
             self.trades_closed += 1
             self.pnl_total += trade.pnl
@@ -149,11 +160,9 @@ if __name__ == '__main__':
     parser.add_argument('--csv', default='btc_1h_yf_clean.csv', help='CSV file to load (default: btc_1h_yf_clean.csv)')
     parser.add_argument('--compression', type=int, default=None, help='Bar compression in minutes (e.g. 60 for 1h, 240 for 4h). If omitted infer from filename.')
     parser.add_argument('--market-next', action='store_true', help='Use market-on-next-bar entries')
+    parser.add_argument('--debug', action='store_true', help='Log every signal, order and trade event')
     args = parser.parse_args()
 
-    # allow overriding strategy default for market entry
-    ThreeBarGapBTC.params.use_market_entry = args.market_next
-
     cerebro = bt.Cerebro()
     csv_file = args.csv
     # infer compression if not specified
@@ -164,14 +173,27 @@ if __name__ == '__main__':
         else:
             comp = 60
 
-data = bt.feeds.GenericCSVData(
-    # use the cleaned CSV (first 3 header rows removed)
-    dataname=csv_file,
-    dtformat='%Y-%m-%d %H:%M:%S%z',   # note %z for +00:00
+# parse the cleaned CSV (first 3 header rows removed) with pandas' C parser
+# instead of backtrader's per-row strptime
+df = pd.read_csv(
+    csv_file,
+    header=None,
+    names=['datetime', 'adjclose', 'close', 'high', 'low', 'open', 'volume'],
+    dtype={'adjclose': 'float64', 'close': 'float64', 'high': 'float64', 'low': 'float64', 'open': 'float64', 'volume': 'float64'},
+    parse_dates=['datetime'],        # '%Y-%m-%d %H:%M:%S%z' -> tz-aware datetimes
+    cache_dates=True,
+    float_precision='round_trip',    # same float values as the old row parser
+)
+df = df.set_index('datetime')
+
+# PandasDirectData walks df.itertuples() (PandasData does a df.iloc lookup per
+# field per bar, which is slower than the CSV feed it replaces)
+data = bt.feeds.PandasDirectData(
+    dataname=df,
     timeframe=bt.TimeFrame.Minutes,
     compression=comp,
 
-    # --- column mapping (0‑based) ---
+    # --- tuple positions (0 = index) ---
     datetime=0,       # "Datetime"
     open=5,           # "Open"
     high=3,           # "High"
@@ -179,14 +201,13 @@ data = bt.feeds.GenericCSVData(
     close=2,          # "Close"
     volume=6,         # "Volume"
     openinterest=-1,
-
-    # cleaned file already contains only data rows
-    headers=False
 )
 
 # add data and strategy, then run
 cerebro.adddata(data)
-cerebro.addstrategy(ThreeBarGapBTC)
+# strategy params must be passed here: assigning to ThreeBarGapBTC.params.<name>
+# does not change the defaults backtrader hands to new instances
+cerebro.addstrategy(ThreeBarGapBTC, use_market_entry=args.market_next, debug=args.debug)
 # add a trade analyzer to collect trade stats
 cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='tradeanalyzer')
 cerebro.broker.setcash(100000.0)
@@ -1,3 +1,5 @@
+import shutil
+
 import backtrader as bt
 
 # --- your strategy (placeholder) ---
@@ -19,11 +21,11 @@ if __name__ == '__main__':
     # open the CSV and skip the first 3 header rows (price/ticker/Datetime)
     # write a temporary cleaned CSV that has the first 3 header rows removed
     cleaned = 'btc_1h_yf_clean.csv'
-    with open('btc_1h_yf.csv', 'r') as src, open(cleaned, 'w') as dst:
+    with open('btc_1h_yf.csv', 'rb') as src, open(cleaned, 'wb') as dst:
         for _ in range(3):
-            next(src)
-        for line in src:
-            dst.write(line)
+            src.readline()
+        # copy the rest in 1MB blocks instead of line-by-line
+        shutil.copyfileobj(src, dst, length=1 << 20)
 
     data = bt.feeds.GenericCSVData(
         dataname=cleaned,
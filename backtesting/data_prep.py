@@ -15,21 +15,31 @@ import os
 import sys
 import pandas as pd
 
+from _parquet_cache import cached_read
+
 CSV_1H = 'btc_1h_yf_clean.csv'
 CSV_4H = 'btc_4h_yf_clean.csv'
 CSV_1D = 'btc_1d_yf_clean.csv'
 
+# bump when _parse_clean_csv's output changes; it keys the Parquet cache
+PARSE_VERSION = 1
+
+
+def _parse_clean_csv(path):
+    df = pd.read_csv(path, header=None, parse_dates=[0])
+    # column mapping in cleaned file:
+    # 0: datetime, 1: adjclose, 2: close, 3: high, 4: low, 5: open, 6: volume
+    df = df.rename(columns={0: 'datetime', 1: 'adjclose', 2: 'close', 3: 'high', 4: 'low', 5: 'open', 6: 'volume'})
+    return df.set_index('datetime')
+
 
 def resample_4h(input_csv=CSV_1H, out_csv=CSV_4H):
     if not os.path.exists(input_csv):
         print(f'input file not found: {input_csv}', file=sys.stderr)
         return None
 
-    df = pd.read_csv(input_csv, header=None, parse_dates=[0])
-    # column mapping in cleaned file:
-    # 0: datetime, 1: adjclose, 2: close, 3: high, 4: low, 5: open, 6: volume
-    df = df.rename(columns={0: 'datetime', 1: 'adjclose', 2: 'close', 3: 'high', 4: 'low', 5: 'open', 6: 'volume'})
-    df = df.set_index('datetime')
+    # parsed input is cached as <input_csv>.parquet when pyarrow is installed
+    df = cached_read(input_csv, _parse_clean_csv, PARSE_VERSION)
     # ensure UTC tz-aware datetimes
     if df.index.tz is None:
         df.index = df.index.tz_localize('UTC')
@@ -50,13 +60,10 @@ def resample_4h(input_csv=CSV_1H, out_csv=CSV_4H):
     df4.dropna(subset=['open', 'high', 'low', 'close'], inplace=True)
 
     # reorder columns to match original cleaned CSV: datetime, adjclose, close, high, low, open, volume
-    out = df4[['adjclose', 'close', 'high', 'low', 'open', 'volume']].copy()
-    # Write without header and using utc offset in datetime
-    out.index = out.index.tz_convert('UTC')
-    out.reset_index(inplace=True)
-    out['datetime'] = out['datetime'].dt.strftime('%Y-%m-%d %H:%M:%S%z')
-    out = out[['datetime', 'adjclose', 'close', 'high', 'low', 'open', 'volume']]
-    out.to_csv(out_csv, index=False, header=False)
+    # (the index is already UTC from above, so no second tz_convert or copy is needed)
+    out = df4[['adjclose', 'close', 'high', 'low', 'open', 'volume']]
+    # Write without header and using utc offset in datetime; pandas formats the index in one pass
+    out.to_csv(out_csv, index=True, header=False, date_format='%Y-%m-%d %H:%M:%S%z')
 
     print(f'Wrote {len(out)} rows to {out_csv}')
     return out_csv
@@ -95,10 +102,8 @@ def download_1d(out_csv=CSV_1D, symbol='BTC-USD', period='max'):
     out['open'] = df['Open']
     out['volume'] = df['Volume'].fillna(0).astype(int)
 
-    out.reset_index(inplace=True)
-    out['datetime'] = out['datetime'].dt.strftime('%Y-%m-%d %H:%M:%S%z')
-    out = out[['datetime', 'adjclose', 'close', 'high', 'low', 'open', 'volume']]
-    out.to_csv(out_csv, index=False, header=False)
+    # the UTC index is written as the leading datetime column, formatted by to_csv in one pass
+    out.to_csv(out_csv, index=True, header=False, date_format='%Y-%m-%d %H:%M:%S%z')
 
     print(f'Wrote {len(out)} rows to {out_csv}')
     return out_csv
@@ -8,6 +8,15 @@ Usage:
 If vectorbt is missing, install with:
     pip install vectorbt
 
+For parameter sweeps, import the module instead of re-running the script:
+run() backtests one configuration and returns its stats in the current
+session, and run_parallel() spreads a list of configurations over processes.
+
+The trade-simulation loop is compiled with numba when it is installed
+(pip install numba); without it a NumPy slice-scan fallback is used.
+Run `python _simulate_aot.py` once to build it ahead of time and skip the
+JIT warmup.
+
 This script will:
  - Load btc_1h_yf_clean.csv
  - Scan for the three-bar gap pattern (same rules as ThreeBarGapBTC)
@@ -16,21 +25,38 @@ This script will:
  - If vectorbt is available, build a Portfolio and print its stats
 """
 
+import hashlib
+import inspect
+import os
 import sys
 from datetime import datetime
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from _njit import njit, NUMBA_AVAILABLE
+from _parquet_cache import cached_read
 
 CSV = 'btc_1h_yf_clean.csv'
 USE_MARKET_NEXT = False  # use market next bar or stop trigger
 SIZE = 1
 
+# bump when _parse_csv's output changes; it keys the Parquet cache
+PARSE_VERSION = 1
 
-def load_data(path=CSV, start=None, end=None):
+
+def _parse_csv(path):
     df = pd.read_csv(path, header=None, parse_dates=[0])
     # original mapping: datetime=0, open=5, high=3, low=4, close=2, volume=6
-    df = df.rename(columns={0: 'datetime', 2: 'close', 3: 'high', 4: 'low', 5: 'open', 6: 'volume'})
-    df = df.set_index('datetime')
+    df = df.rename(columns={0: 'datetime', 1: 'adjclose', 2: 'close', 3: 'high', 4: 'low', 5: 'open', 6: 'volume'})
+    return df.set_index('datetime')
+
+
+def load_data(path=CSV, start=None, end=None):
+    # parsed frames are cached as <path>.parquet when pyarrow is installed
+    df = cached_read(path, _parse_csv, PARSE_VERSION)
     # optionally restrict to a given time window
     if start is not None or end is not None:
         # pandas will handle None values correctly when slicing
@@ -38,212 +64,384 @@ def load_data(path=CSV, start=None, end=None):
     return df
 
 
-def run_sim(df, use_market_next=USE_MARKET_NEXT, size=SIZE):
-    n = len(df)
-    trades = []
-    signals = []
-
-    in_position = False
-    pending_entry = None
-    pos = None
-
-    # iterate with index i representing current bar (like Backtrader next())
-    for i in range(n):
-        if i < 3:
+# column positions in the float64 OHLC block built by run_sim_arrays
+OPEN, HIGH, LOW, CLOSE = 0, 1, 2, 3
+
+# reason codes returned by the simulation kernel
+REASON_NO_FILL = -1  # entry never executed
+REASON_OPEN = 0      # entered, no exit before the end of the data
+REASON_TP = 1
+REASON_SL = 2
+
+# display labels indexed by reason code (REASON_OPEN/TP/SL)
+REASON_LABELS = np.array(['open', 'TP', 'SL'])
+
+
+@njit(cache=True)
+def _find_exit(open_, high, low, start, tp_price, sl_price):
+    """Return (exit_idx, exit_price, reason_code) for the first bar >= start that hits TP or SL.
+
+    Returns (-1, nan, REASON_OPEN) when neither level is reached before the end of the data.
+    """
+    for k in range(start, high.shape[0]):
+        highk = high[k]
+        lowk = low[k]
+
+        tp_hit = highk >= tp_price
+        sl_hit = lowk <= sl_price
+
+        if tp_hit and not sl_hit:
+            return k, tp_price, REASON_TP
+        if sl_hit and not tp_hit:
+            return k, sl_price, REASON_SL
+        if tp_hit and sl_hit:
+            # both hit same bar — choose first-to-hit by proximity heuristic
+            # assume price moved from open -> high -> low within bar or vice versa
+            # without intra-bar sequencing data, choose the closer level to the bar open
+            openk = open_[k]
+            d_tp = abs(highk - tp_price) + abs(openk - tp_price)
+            d_sl = abs(lowk - sl_price) + abs(openk - sl_price)
+            # prefer the nearer target
+            if d_tp <= d_sl:
+                return k, tp_price, REASON_TP
+            return k, sl_price, REASON_SL
+    return -1, np.nan, REASON_OPEN
+
+
+@njit(cache=True)
+def _simulate(open_, high, low, sig_idx, stop_prices, tp_prices, sl_prices, use_market_next):
+    """Run the one-position-at-a-time entry/exit state machine over candidate signals.
+
+    Returns arrays with one slot per accepted signal:
+    (signal_idx, entry_idx, exit_idx, entry_price, exit_price, reason_code).
+    Index slots are -1 and prices nan where the step never happened.
+    """
+    n = high.shape[0]
+    m = sig_idx.shape[0]
+    taken = np.empty(m, np.int64)
+    entry_idx = np.full(m, -1, np.int64)
+    exit_idx = np.full(m, -1, np.int64)
+    entry_price = np.full(m, np.nan)
+    exit_price = np.full(m, np.nan)
+    reason = np.full(m, REASON_NO_FILL, np.int8)
+
+    t = 0
+    # first bar on which a new signal may be taken (open/pending trades block signals)
+    next_free = 3
+    for s in range(m):
+        i = sig_idx[s]
+        if i < next_free:
             continue
-
-        # 1) If currently in a position, check TP/SL on this bar and close if hit
-        if in_position and pos is not None:
-            highk = df.iloc[i]['high']
-            lowk = df.iloc[i]['low']
-
-            tp_hit = (pos.get('tp') is not None) and (highk >= pos['tp'])
-            sl_hit = (pos.get('sl') is not None) and (lowk <= pos['sl'])
-
-            exit_idx = None
-            exit_price = None
-            reason = None
-
-            if tp_hit and not sl_hit:
-                exit_idx = i
-                exit_price = pos['tp']
-                reason = 'TP'
-            elif sl_hit and not tp_hit:
-                exit_idx = i
-                exit_price = pos['sl']
-                reason = 'SL'
-            elif tp_hit and sl_hit:
-                # both hit same bar — select nearest by proximity heuristic
-                openk = df.iloc[i]['open']
-                d_tp = abs(df.iloc[i]['high'] - pos['tp']) + abs(openk - pos['tp'])
-                d_sl = abs(df.iloc[i]['low'] - pos['sl']) + abs(openk - pos['sl'])
-                if d_tp <= d_sl:
-                    exit_idx = i
-                    exit_price = pos['tp']
-                    reason = 'TP'
-                else:
-                    exit_idx = i
-                    exit_price = pos['sl']
-                    reason = 'SL'
-
-            if exit_idx is not None:
-                pnl = (exit_price - pos['entry_price']) * size
-                trades.append({
-                    'signal_dt': pos.get('signal_dt'), 'entry_dt': pos.get('entry_dt'), 'entry_price': pos.get('entry_price'),
-                    'exit_dt': df.index[exit_idx], 'exit_price': exit_price, 'reason': reason, 'pnl': pnl
-                })
-                in_position = False
-                pos = None
-            # while in a position we ignore any new signals
+        taken[t] = i
+
+        if use_market_next:
+            # entry at next bar open
+            e = i + 1
+            if e >= n:
+                # no next bar — a market-next entry cannot execute; keep the signal, skip the trade
+                t += 1
+                continue
+            ep = open_[e]
+        else:
+            # stop order — pending until a later bar's high reaches the stop price
+            e = -1
+            for j in range(i + 1, n):
+                if high[j] >= stop_prices[s]:
+                    e = j
+                    break
+            if e < 0:
+                # stop never triggers — the pending entry blocks further signals
+                t += 1
+                break
+            ep = stop_prices[s]
+
+        entry_idx[t] = e
+        entry_price[t] = ep
+        # exits are checked from the bar after the fill
+        x, xp, r = _find_exit(open_, high, low, e + 1, tp_prices[s], sl_prices[s])
+        exit_idx[t] = x
+        exit_price[t] = xp
+        reason[t] = r
+        t += 1
+        if x < 0:
+            # position remains open until the end of the data
+            break
+        if use_market_next:
+            # market-next entries resume signal scanning on the following bar
+            next_free = i + 1
+        else:
+            # the exit bar itself is not scanned for a new signal
+            next_free = x + 1
+
+    return taken[:t], entry_idx[:t], exit_idx[:t], entry_price[:t], exit_price[:t], reason[:t]
+
+
+def _first_hit(mask_fn, start, n, window=64):
+    """Return the first bar index >= start where mask_fn(lo, hi) is True, or -1.
+
+    The mask is evaluated on growing slices so a nearby hit only touches a few
+    bars while a distant one costs O(log n) NumPy calls instead of a Python loop.
+    """
+    lo = start
+    while lo < n:
+        hi = min(n, lo + window)
+        mask = mask_fn(lo, hi)
+        k = int(np.argmax(mask))
+        if mask[k]:
+            return lo + k
+        lo = hi
+        window *= 2
+    return -1
+
+
+def _simulate_numpy(open_, high, low, sig_idx, stop_prices, tp_prices, sl_prices, use_market_next):
+    """NumPy counterpart of `_simulate` for when numba is not installed.
+
+    Same inputs, outputs and trade rules; the per-bar fill and exit searches are
+    vectorized slice scans, so Python only loops over the candidate signals.
+    """
+    n = high.shape[0]
+    m = sig_idx.shape[0]
+    taken = np.empty(m, np.int64)
+    entry_idx = np.full(m, -1, np.int64)
+    exit_idx = np.full(m, -1, np.int64)
+    entry_price = np.full(m, np.nan)
+    exit_price = np.full(m, np.nan)
+    reason = np.full(m, REASON_NO_FILL, np.int8)
+
+    t = 0
+    next_free = 3
+    for s in range(m):
+        i = sig_idx[s]
+        if i < next_free:
+            continue
+        taken[t] = i
+
+        if use_market_next:
+            e = i + 1
+            if e >= n:
+                t += 1
+                continue
+            ep = open_[e]
+        else:
+            stop = stop_prices[s]
+            e = _first_hit(lambda lo, hi: high[lo:hi] >= stop, i + 1, n)
+            if e < 0:
+                t += 1
+                break
+            ep = stop
+
+        entry_idx[t] = e
+        entry_price[t] = ep
+        tp, sl = tp_prices[s], sl_prices[s]
+        x = _first_hit(lambda lo, hi: (high[lo:hi] >= tp) | (low[lo:hi] <= sl), e + 1, n)
+        if x >= 0:
+            # resolve the hit bar with the same rules (and tie-break) as the compiled kernel
+            x, xp, r = _find_exit(open_, high, low, x, tp, sl)
+        else:
+            xp, r = np.nan, REASON_OPEN
+        exit_idx[t] = x
+        exit_price[t] = xp
+        reason[t] = r
+        t += 1
+        if x < 0:
+            break
+        next_free = i + 1 if use_market_next else x + 1
+
+    return taken[:t], entry_idx[:t], exit_idx[:t], entry_price[:t], exit_price[:t], reason[:t]
+
+
+def kernel_source_hash():
+    """63-bit digest of the `_find_exit` and `_simulate` source.
+
+    _simulate_aot.py records it in the threebar_sim build, so a build made from
+    older kernel source is detected and not used.
+    """
+    src = ''.join(inspect.getsource(getattr(f, 'py_func', f)) for f in (_find_exit, _simulate))
+    return int.from_bytes(hashlib.sha1(src.encode()).digest()[:8], 'little') >> 1
+
+
+# Prefer the ahead-of-time build (python _simulate_aot.py) while it matches the
+# current kernel source, then the JIT-compiled state machine when numba is present,
+# otherwise the NumPy slice-scan version.
+_simulate_jit = _simulate if NUMBA_AVAILABLE else _simulate_numpy
+try:
+    import threebar_sim
+except Exception:
+    threebar_sim = None
+if threebar_sim is not None and getattr(threebar_sim, 'kernel_hash', lambda: None)() == kernel_source_hash():
+    _simulate_fast = threebar_sim.simulate
+else:
+    if threebar_sim is not None:
+        print('threebar_sim is stale (kernel source changed); rebuild with `python _simulate_aot.py`.'
+              ' Using the JIT kernel meanwhile.', file=sys.stderr)
+    _simulate_fast = _simulate_jit
+
+
+def ohlc_arrays(df, dtype=np.float64):
+    """Return the df's open/high/low/close as one (n, 4) block (columns OPEN..CLOSE).
+
+    dtype=np.float32 halves the bytes the exit scans move, at the cost of
+    rounding prices to ~7 significant digits (about 1 cent at 100k); PnL is
+    still computed in float64.
+    """
+    return df[['open', 'high', 'low', 'close']].to_numpy(dtype=dtype, copy=False)
+
+
+def run_sim_arrays(df, use_market_next=USE_MARKET_NEXT, size=SIZE, dtype=np.float64):
+    """Run the simulation and return trades as parallel NumPy arrays.
+
+    Returns (trades, signal_ix). `trades` maps column name -> equal-length array:
+    signal_ix, entry_ix, exit_ix (-1 while open), entry_price, exit_price and pnl
+    (nan while open) and reason (REASON_OPEN / REASON_TP / REASON_SL).
+    `signal_ix` holds the bar index of every accepted signal.
+    dtype selects the price precision used by the simulation (see ohlc_arrays).
+    """
+    # one conversion to a float block, then plain positional indexing (no per-bar pandas lookups)
+    return _run_sim_ohlc(ohlc_arrays(df, dtype), use_market_next, size)
+
+
+def _run_sim_ohlc(arr, use_market_next, size):
+    """run_sim_arrays on a raw (n, 4) OHLC block; kept DataFrame-free so it is cheap to ship to workers."""
+    n = arr.shape[0]
+    # C-contiguous columns so numba specializes the kernels on unit-stride arrays
+    # (a no-op for pandas' usual column-major block, a copy otherwise)
+    o, h, l, c = (np.ascontiguousarray(arr[:, k]) for k in (OPEN, HIGH, LOW, CLOSE))
+
+    # Pattern scan in one vectorized pass over zero-copy 3-bar windows [i-3, i-2, i-1]:
+    # a signal fires on bar i when bar1 = i-3 is red and bar3 = i-1 has its high
+    # and close below bar1's low. The last bar has no following bar to signal on.
+    if n > 3:
+        wo, wh, wl, wc = (sliding_window_view(a[:-1], 3) for a in (o, h, l, c))
+        red = wc[:, 0] < wo[:, 0]
+        gap = (wh[:, 2] < wl[:, 0]) & (wc[:, 2] < wl[:, 0])
+        sig_idx = np.flatnonzero(red & gap) + 3
+    else:
+        sig_idx = np.empty(0, np.int64)
+
+    # the AOT module is only built for float64 input
+    simulate = _simulate_fast if arr.dtype == np.float64 else _simulate_jit
+    taken, entry_idx, exit_idx, entry_price, exit_price, reason = simulate(
+        o, h, l, sig_idx,
+        h[sig_idx - 1],  # stop entry at bar3 high
+        l[sig_idx - 3],  # target: fill the gap up to bar1 low
+        l[sig_idx - 1],  # stop: below bar3
+        use_market_next,
+    )
+
+    # keep filled entries; an open position at the end is only reported for market-next entries
+    is_trade = (entry_idx >= 0) & ((exit_idx >= 0) | use_market_next)
+    trades = {
+        'signal_ix': taken[is_trade],
+        'entry_ix': entry_idx[is_trade],
+        'exit_ix': exit_idx[is_trade],
+        'entry_price': entry_price[is_trade],
+        'exit_price': exit_price[is_trade],
+        'pnl': (exit_price[is_trade] - entry_price[is_trade]) * size,
+        'reason': reason[is_trade],
+    }
+    return trades, taken
+
+
+def summarize_trades(trades, signal_ix):
+    """Return summary stats (counts, wins/losses, total PnL of closed trades) for run_sim_arrays output."""
+    pnl = trades['pnl']
+    closed = np.isfinite(pnl)
+    return {
+        'trades': len(pnl),
+        'signals': len(signal_ix),
+        'closed': int(closed.sum()),
+        'wins': int((pnl[closed] > 0).sum()),
+        'losses': int((pnl[closed] <= 0).sum()),
+        'total_pnl': float(pnl[closed].sum()),
+    }
+
+
+def _sweep_worker(arr, use_market_next, size):
+    # module-level so child processes can import it (and reuse numba's on-disk cache)
+    return summarize_trades(*_run_sim_ohlc(arr, use_market_next, size))
+
+
+def run_parallel(configs, max_workers=None):
+    """Run a parameter sweep / multi-symbol backtest across processes.
+
+    configs: iterable of (csv, start, end, use_market_next, size) tuples.
+    Returns {config: summary dict} (see summarize_trades). Each CSV window is
+    loaded once in the parent and only its OHLC ndarray is sent to the workers.
+    """
+    configs = list(configs)
+    blocks = {}
+    for csv, start, end, _, _ in configs:
+        if (csv, start, end) not in blocks:
+            blocks[(csv, start, end)] = ohlc_arrays(load_data(csv, start=start, end=end))
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as ex:
+        futures = {}
+        for cfg in configs:
+            csv, start, end, use_market_next, size = cfg
+            futures[ex.submit(_sweep_worker, blocks[(csv, start, end)], use_market_next, size)] = cfg
+        return {futures[f]: f.result() for f in as_completed(futures)}
+
+
+def trades_to_dicts(df, trades, limit=None):
+    """Expand the array trade record from run_sim_arrays into a list of per-trade dicts."""
+    count = len(trades['pnl']) if limit is None else min(limit, len(trades['pnl']))
+
+    # gather all timestamps in three vectorized lookups instead of one df.index[...] per trade
+    idx = df.index
+    signal_dts = idx[trades['signal_ix'][:count]]
+    entry_dts = idx[trades['entry_ix'][:count]]
+    exit_dts = idx[np.maximum(trades['exit_ix'][:count], 0)]
+    # int8 reason codes -> labels in one lookup
+    reasons = REASON_LABELS[trades['reason'][:count]].tolist()
+
+    out = []
+    for t in range(count):
+        if trades['exit_ix'][t] < 0:
+            # no exit within dataset — position remains open until end
+            out.append({
+                'signal_dt': signal_dts[t], 'entry_dt': entry_dts[t], 'entry_price': trades['entry_price'][t],
+                'exit_dt': None, 'exit_price': None, 'reason': None, 'pnl': None
+            })
             continue
+        out.append({
+            'signal_dt': signal_dts[t], 'entry_dt': entry_dts[t], 'entry_price': trades['entry_price'][t],
+            'exit_dt': exit_dts[t], 'exit_price': trades['exit_price'][t],
+            'reason': reasons[t], 'pnl': trades['pnl'][t]
+        })
+    return out
 
-        # 2) Pending entry checks: stop/order fills block new signals until resolved
-        if pending_entry is not None and not in_position:
-            if pending_entry.get('type') == 'market_next':
-                if i == pending_entry.get('entry_idx'):
-                    # execute market next at this bar's open if price not specified
-                    entry_price = pending_entry.get('entry_price') or df.iloc[i]['open']
-                    entry_dt = pending_entry.get('entry_dt') or df.index[i]
-                    pos = dict(signal_dt=pending_entry.get('signal_dt'), entry_dt=entry_dt, entry_price=entry_price,
-                               tp=pending_entry.get('tp_price'), sl=pending_entry.get('sl_price'))
-                    in_position = True
-                    pending_entry = None
-                else:
-                    # still waiting for market-next bar — block new signals
-                    continue
-            elif pending_entry.get('type') == 'stop':
-                stop_price = pending_entry.get('stop_price')
-                if df.iloc[i]['high'] >= stop_price:
-                    entry_price = stop_price
-                    entry_dt = df.index[i]
-                    pos = dict(signal_dt=pending_entry.get('signal_dt'), entry_dt=entry_dt, entry_price=entry_price,
-                               tp=pending_entry.get('tp_price'), sl=pending_entry.get('sl_price'))
-                    in_position = True
-                    pending_entry = None
-                else:
-                    # still waiting for stop to trigger — block new signals
-                    continue
-
-        # 3) No active or pending entries — look for pattern signals
-        if not in_position and pending_entry is None:
-            # check pattern using bar1 = i-3 and bar3 = i-1
-            bar1 = df.iloc[i-3]
-            bar3 = df.iloc[i-1]
-
-            cond_bar1_red = bar1['close'] < bar1['open']
-            cond_gap = (bar3['high'] < bar1['low']) and (bar3['close'] < bar1['low'])
-
-            if cond_bar1_red and cond_gap:
-                # signal generated at current bar time
-                signals.append(df.index[i])
-                tp_price = bar1['low']
-                sl_price = bar3['low']
-                stop_price = bar3['high']
-                signal_dt = df.index[i]
-
-                # create entry depending on mode
-                if use_market_next:
-                    # entry at next bar open
-                    entry_idx = i + 1
-                    if entry_idx >= n:
-                        # no next bar — create a pending market entry (blocks new signals)
-                        pending_entry = dict(type='market_next', entry_idx=entry_idx, entry_price=None, entry_dt=None,
-                                             signal_dt=signal_dt, tp_price=tp_price, sl_price=sl_price)
-                        signals.append(signal_dt)
-                        continue
-                    entry_price = df.iloc[entry_idx]['open']
-                    entry_dt = df.index[entry_idx]
-                else:
-                    # stop order — we place a pending stop entry that blocks further signals
-                    entry_idx = None
-                    entry_price = None
-                    entry_dt = None
-                    # mark a pending stop (will be checked on subsequent bars)
-                    pending_entry = dict(type='stop', stop_price=stop_price, signal_dt=signal_dt,
-                                         tp_price=tp_price, sl_price=sl_price)
-                    # keep scanning future bars in the normal loop until the pending stop triggers
-                    continue
-
-                # position is opened at entry_idx (market-next and stop fills reached here)
-                in_position = True
-
-                # now find exit starting from entry_idx+1
-                exit_idx = None
-                exit_price = None
-                for k in range(entry_idx+1, n):
-                    highk = df.iloc[k]['high']
-                    lowk = df.iloc[k]['low']
-
-                    tp_hit = highk >= tp_price
-                    sl_hit = lowk <= sl_price
-
-                    if tp_hit and not sl_hit:
-                        exit_idx = k
-                        exit_price = tp_price
-                        reason = 'TP'
-                        break
-                    if sl_hit and not tp_hit:
-                        exit_idx = k
-                        exit_price = sl_price
-                        reason = 'SL'
-                        break
-                    if tp_hit and sl_hit:
-                        # both hit same bar — choose first-to-hit by proximity heuristic
-                        # assume price moved from open -> high -> low within bar or vice versa
-                        # without intra-bar sequencing data, choose the closer level to the bar open
-                        openk = df.iloc[k]['open']
-                        # distance to tp and sl
-                        d_tp = abs(highk - tp_price) + abs(openk - tp_price)
-                        d_sl = abs(lowk - sl_price) + abs(openk - sl_price)
-                        # prefer the nearer target
-                        if d_tp <= d_sl:
-                            exit_idx = k
-                            exit_price = tp_price
-                            reason = 'TP'
-                        else:
-                            exit_idx = k
-                            exit_price = sl_price
-                            reason = 'SL'
-                        break
-
-                if exit_idx is None:
-                    # no exit within dataset — assume position remains open until end
-                    trades.append({
-                        'signal_dt': signal_dt, 'entry_dt': entry_dt, 'entry_price': entry_price,
-                        'exit_dt': None, 'exit_price': None, 'reason': None, 'pnl': None
-                    })
-                    # leave in_position True and break (or we can continue scanning but strategy wouldn't allow another signal)
-                    # keep 'pos' to indicate an active position and break out of scanning loop
-                    pos = dict(signal_dt=signal_dt, entry_dt=entry_dt, entry_price=entry_price, tp=tp_price, sl=sl_price)
-                    in_position = True
-                    break
-                else:
-                    pnl = (exit_price - entry_price) * size
-                    trades.append({
-                        'signal_dt': signal_dt, 'entry_dt': entry_dt, 'entry_price': entry_price,
-                        'exit_dt': df.index[exit_idx], 'exit_price': exit_price, 'reason': reason,
-                        'pnl': pnl
-                    })
-                    in_position = False
-                    pending_entry = None
 
-        # else: if already in position, strategy blocks new signals
+def run_sim(df, use_market_next=USE_MARKET_NEXT, size=SIZE):
+    """Run the simulation and return (trades, signals) as a list of dicts and a list of timestamps."""
+    trades, signal_ix = run_sim_arrays(df, use_market_next=use_market_next, size=size)
+    return trades_to_dicts(df, trades), list(df.index[signal_ix])
 
-    return trades, signals
 
+def run(csv=CSV, start=None, end=None, use_market_next=USE_MARKET_NEXT, size=SIZE, dtype=np.float64):
+    """Backtest one CSV window and return its summary stats dict (see summarize_trades).
 
-if __name__ == '__main__':
+    Meant for sweeps inside one Python session, e.g.
+        from vectorbt_backtest import run
+        results = [run(csv, use_market_next=m) for m in (False, True)]
+    so the kernels are compiled / loaded from numba's cache once instead of per process.
+    """
+    df = load_data(csv, start=start, end=end)
+    return summarize_trades(*run_sim_arrays(df, use_market_next=use_market_next, size=size, dtype=dtype))
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description='Run vectorbt-style ThreeBarGap backtest')
     parser.add_argument('--start', help='Start datetime (inclusive) e.g. 2024-01-01T00:00:00')
     parser.add_argument('--end', help='End datetime (inclusive) e.g. 2024-02-19T23:00:00')
     parser.add_argument('--csv', help='CSV file to load (default btc_1h_yf_clean.csv)', default=CSV)
     parser.add_argument('--market-next', action='store_true', help='Use market-on-next-bar entry semantics')
-    args = parser.parse_args()
+    parser.add_argument('--float32', action='store_true', help='Simulate on float32 prices (less memory traffic, ~1 cent rounding)')
+    args = parser.parse_args(argv)
 
     df = load_data(args.csv, start=args.start, end=args.end)
-    if args.market_next:
-        USE_MARKET_NEXT = True
-    print('Loaded', len(df), 'rows from', CSV)
+    use_market_next = args.market_next or USE_MARKET_NEXT
+    print('Loaded', len(df), 'rows from', args.csv)
     if args.start or args.end:
         print('Window start/end:', args.start, args.end)
 
@@ -255,47 +453,48 @@ if __name__ == '__main__':
         vbt_available = False
         print('vectorbt not installed — running local simulator. To enable vectorbt features run: pip install vectorbt')
 
-    trades, signals = run_sim(df, use_market_next=USE_MARKET_NEXT, size=SIZE)
+    trades, signal_ix = run_sim_arrays(df, use_market_next=use_market_next, size=SIZE,
+                                       dtype=np.float32 if args.float32 else np.float64)
 
-    print('\nSimulated trades:', len(trades))
-    print('Signals detected:', len(signals))
-    wins = [t for t in trades if t['pnl'] is not None and t['pnl'] > 0]
-    losses = [t for t in trades if t['pnl'] is not None and t['pnl'] <= 0]
-    print('Closed trades:', len([t for t in trades if t['pnl'] is not None]))
-    print('Wins:', len(wins), 'Losses:', len(losses))
-    total_pnl = sum([t['pnl'] for t in trades if t['pnl'] is not None])
-    print('Total PnL:', total_pnl)
+    # summary stats straight from the trade arrays
+    stats = summarize_trades(trades, signal_ix)
+    print('\nSimulated trades:', stats['trades'])
+    print('Signals detected:', stats['signals'])
+    print('Closed trades:', stats['closed'])
+    print('Wins:', stats['wins'], 'Losses:', stats['losses'])
+    print('Total PnL:', stats['total_pnl'])
 
-    if len(trades) > 0:
+    if stats['trades'] > 0:
         print('\nFirst 10 trades:')
-        for t in trades[:10]:
+        for t in trades_to_dicts(df, trades, limit=10):
             print(t)
-    if len(signals) > 0:
+    if len(signal_ix) > 0:
         print('\nFirst 10 signals:')
-        for s in signals[:10]:
+        for s in df.index[signal_ix[:10]]:
             print('-', s)
 
     # If vectorbt is available, make a portfolio summary using trade-level returns
     if vbt_available:
-        import numpy as np
+        # positions of every entry and of the closed trades' exits
+        entry_ix = trades['entry_ix']
+        closed = trades['exit_ix'] >= 0
+        exit_ix = trades['exit_ix'][closed]
+
         # build a simple cashflow series for each trade (entry negative, exit positive)
-        cashflow = pd.Series(0.0, index=df.index)
-        for t in trades:
-            if t['entry_dt'] is not None:
-                cashflow.loc[t['entry_dt']] -= t['entry_price'] * SIZE
-            if t['exit_dt'] is not None:
-                cashflow.loc[t['exit_dt']] += t['exit_price'] * SIZE
+        cf = np.zeros(len(df))
+        np.add.at(cf, entry_ix, -trades['entry_price'] * SIZE)
+        np.add.at(cf, exit_ix, trades['exit_price'][closed] * SIZE)
+        cashflow = pd.Series(cf, index=df.index)
         if cashflow.abs().sum() == 0:
             print('No cashflows to feed vectorbt — falling back to from_signals')
 
         # Build boolean entries/exits series and use from_signals (safer and available)
-        entries = pd.Series(False, index=df.index)
-        exits = pd.Series(False, index=df.index)
-        for t in trades:
-            if t['entry_dt'] is not None:
-                entries.loc[t['entry_dt']] = True
-            if t['exit_dt'] is not None:
-                exits.loc[t['exit_dt']] = True
+        entry_mask = np.zeros(len(df), dtype=bool)
+        entry_mask[entry_ix] = True
+        exit_mask = np.zeros(len(df), dtype=bool)
+        exit_mask[exit_ix] = True
+        entries = pd.Series(entry_mask, index=df.index)
+        exits = pd.Series(exit_mask, index=df.index)
 
         try:
             port = vbt.Portfolio.from_signals(
@@ -308,3 +507,7 @@ if __name__ == '__main__':
             print('vectorbt portfolio creation failed:', e)
 
     print('\nDone.')
+
+
+if __name__ == '__main__':
+    main()
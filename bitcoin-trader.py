@@ -6,19 +6,43 @@ Sends Discord messages when gaps are found/closed and records gaps to CSV.
 Runs continuously until stopped by the user.
 """
 
+import io
 import logging
+import os
+import queue
+import threading
 import time
+import atexit
 import csv
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from dataclasses import dataclass, asdict, fields
-from datetime import datetime
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
 import schedule
 from typing import Optional, List
 
+import numpy as np
 import pandas as pd
 
-from pionex_downloader import PionexDownloader
-from discord.messages import send_msg
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pv
+except ImportError:
+    # optional: OHLCV CSVs are read with pandas' C parser instead
+    pa = pv = None
+
+try:
+    import polars as pl
+except ImportError:
+    # optional: price envelopes are computed from a pyarrow/pandas read instead
+    pl = None
+
+from gap_kernels import (GAP_NONE, GAP_UP, GAP_DOWN, MODE_BODY, MODE_IDS, NUMBA_AVAILABLE, detect_gap_kernel,
+                         scan_gaps_kernel)
+from parquet_mirror import mirrored_read
+from pionex_downloader import OHLCV_COLUMNS, OHLCV_DTYPES, PionexDownloader
+from discord.messages import new_session, send_msg
 
 # Configure logging to both file and stdout
 log_handlers = [
@@ -33,6 +57,11 @@ GAPS_DIR.mkdir(exist_ok=True)
 GAPS_CSV = GAPS_DIR / 'gaps.csv'
 
 
+def _utcnow() -> datetime:
+    """Current UTC time as a naive datetime, the form gaps.csv timestamps are stored in."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 @dataclass
 class GapRecord:
     id: str
@@ -46,106 +75,364 @@ class GapRecord:
     closed_time: Optional[str] = ''
     close_price: Optional[float] = None
 
+    def __post_init__(self):
+        # records rebuilt from CSV rows get strings; convert the numbers once here
+        # (unparseable bounds become nan, which never compares as hit)
+        self.gap_low = _to_float(self.gap_low)
+        self.gap_high = _to_float(self.gap_high)
+        self.close_price = None if self.close_price in (None, '') else _to_float(self.close_price)
+
+
+# gaps CSV columns, in GapRecord field order
+_FIELDNAMES = tuple(fld.name for fld in fields(GapRecord))
+
+
+@dataclass
+class OpenGaps:
+    """Open gaps as parallel columns, one entry per open row (see GapManager.open_gap_view)."""
+    ids: List[str]
+    timeframes: np.ndarray  # str
+    gap_types: np.ndarray  # str, 'up' or 'down'
+    gap_lows: np.ndarray  # float64
+    gap_highs: np.ndarray  # float64
+
+
+def _to_float(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+def _locked(method):
+    """Run a GapManager method while holding the manager's lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+# columns of the closures side-log (see GapManager.close_gaps)
+CLOSURE_FIELDS = ['id', 'closed_time', 'close_price']
+
 
 class GapManager:
-    """Manages gap records saved to CSV and status updates."""
+    """Manages gap records saved to CSV and status updates.
+
+    New gaps are appended to `csv_path`; closures are appended to a side-log next to
+    it (`<stem>_closures.csv`) instead of rewriting the whole file each time. Both are
+    read together, and `compact()` folds the closures back into `csv_path`.
+    """
 
     def __init__(self, csv_path: Path = GAPS_CSV):
         self.csv_path = csv_path
+        # guards everything below; timeframes may be processed from several threads
+        # (re-entrant: public methods call each other)
+        self._lock = threading.RLock()
+        self.closures_path = csv_path.with_name(f"{csv_path.stem}_closures.csv")
         if not self.csv_path.exists():
-            from dataclasses import fields
-            fieldnames = [fld.name for fld in fields(GapRecord)]
             with open(self.csv_path, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer = csv.DictWriter(f, fieldnames=_FIELDNAMES)
                 writer.writeheader()
+        # in-memory copy of the CSV rows (as read by csv.DictReader, closures applied)
+        # and the file signatures they were loaded from, so the files are only parsed
+        # again when something outside this manager has changed them
+        self._rows: List[dict] = []
+        self._rows_sig = None
+        # timeframe -> start times (parsed once, as datetimes) of every row, for O(1)
+        # "already recorded" checks
+        self._by_tf: dict = {}
+        # gap id -> rows with that id (normally exactly one), for closing without a scan
+        self._by_id: dict = {}
+        # number of the last gap id issued (G00042 -> 42), so new ids never need a scan
+        self._last_id = 0
+        # timeframe -> {gap id -> GapRecord} of every open gap, in file order; kept up
+        # to date by _append/close_gaps so per-bar checks only touch one timeframe
+        self._open_by_tf: dict = {}
+        # (timeframe, gap type) (None: any) -> column view of those open gaps, built on
+        # demand and dropped whenever _rows changes
+        self._open_views: dict = {}
+        # append handle + csv.writer kept open between _append calls (opened on first use)
+        self._append_fh = None
+        self._writer = None
+        self._read_all()
+
+    @staticmethod
+    def _file_sig(path: Path):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
 
-    def _next_id(self) -> str:
-        # Simple incremental ID based on existing rows
-        rows = self._read_all()
-        return f"G{len(rows) + 1:05d}"
+    def _sig(self):
+        return (self._file_sig(self.csv_path), self._file_sig(self.closures_path))
 
-    def _read_all(self) -> List[dict]:
-        with open(self.csv_path, newline='') as f:
-            reader = csv.DictReader(f)
-            return list(reader)
+    @staticmethod
+    def _parse_start(start):
+        # parse once so equal instants written differently still match; unparseable
+        # values are kept as the raw string
+        if isinstance(start, datetime):
+            return start
+        try:
+            return datetime.fromisoformat(start)
+        except Exception:
+            return start
+
+    def _index_row(self, r: dict):
+        start = r.get('start_time') or r.get('start') or ''
+        self._by_tf.setdefault(r.get('timeframe'), set()).add(self._parse_start(start))
+        self._by_id.setdefault(r.get('id'), []).append(r)
+        gap_id = r.get('id') or ''
+        if gap_id[1:].isdigit():
+            self._last_id = max(self._last_id, int(gap_id[1:]))
+
+    def _rebuild_index(self):
+        self._by_tf = {}
+        self._by_id = {}
+        # ids used to be numbered by row count; keep that as the floor for odd ids
+        self._last_id = len(self._rows)
+        for r in self._rows:
+            self._index_row(r)
+
+    def _record(self, r: dict) -> GapRecord:
+        # only the GapRecord columns, so a CSV with extra/legacy columns still loads
+        return GapRecord(**{n: r.get(n) for n in _FIELDNAMES})
+
+    def _rebuild_open(self):
+        self._open_by_tf = {}
+        for r in self._rows:
+            if r.get('status') == 'open':
+                self._open_by_tf.setdefault(r.get('timeframe'), {})[r.get('id')] = self._record(r)
 
-    def add_gap(self, timeframe: str, start_time: datetime, gap_type: str, gap_low: float, gap_high: float, data_dir: str = 'data') -> Optional[GapRecord]:
+    def _read_all(self) -> List[dict]:
+        """Return the cached gap rows, reloading them if the CSV changed on disk."""
+        sig = self._sig()
+        if sig != self._rows_sig:
+            # the file may have been replaced; never append through a stale handle
+            self.close()
+            if sig[0] is None:
+                self._rows = []
+            else:
+                with open(self.csv_path, newline='') as f:
+                    reader = csv.DictReader(f)
+                    self._rows = list(reader)
+            self._rebuild_index()
+            if sig[1] is not None:
+                self._apply_closures()
+            self._rebuild_open()
+            self._open_views = {}
+            self._rows_sig = sig
+        return self._rows
+
+    def _apply_closures(self):
+        with open(self.closures_path, newline='') as f:
+            for c in csv.DictReader(f):
+                for r in self._by_id.get(c.get('id'), ()):
+                    if r.get('status') == 'open':
+                        r['status'] = 'closed'
+                        r['closed_time'] = c.get('closed_time') or ''
+                        r['close_price'] = c.get('close_price') or ''
+
+    @_locked
+    def is_recorded(self, timeframe: str, start_time) -> bool:
+        """True if a gap for `timeframe` starting at `start_time` (datetime or ISO string) is already in the CSV."""
+        self._read_all()
+        return self._parse_start(start_time) in self._by_tf.get(timeframe, ())
+
+    def add_gap(self, timeframe: str, start_time: datetime, gap_type: str, gap_low: float, gap_high: float, data_dir: str = 'data',
+                found_time: Optional[datetime] = None) -> Optional[GapRecord]:
         """Add a gap record after performing lightweight sanity checks against recent data.
 
-        Returns the created GapRecord, or None if the record was rejected as implausible.
+        `found_time` defaults to now (UTC). Returns the created GapRecord, or None if the
+        record was rejected as implausible.
+        """
+        return self.add_gaps([(timeframe, start_time, gap_type, gap_low, gap_high)], data_dir=data_dir, found_time=found_time)[0]
+
+    @_locked
+    def add_gaps(self, gaps, data_dir: str = 'data', found_time: Optional[datetime] = None) -> List[Optional[GapRecord]]:
+        """Add several gaps, given as (timeframe, start_time, gap_type, gap_low, gap_high), with one write.
+
+        Each gap gets the same checks as add_gap, and all share one `found_time`
+        (default: now, UTC). Returns the created GapRecord or None (rejected) for each
+        input, in order.
         """
+        self._read_all()
+        found_iso = (found_time or _utcnow()).isoformat()
+        # timeframe -> (min low, max high) of its data file, read at most once per call
+        ranges = {}
+        results = []
+        recs = []
+        for timeframe, start_time, gap_type, gap_low, gap_high in gaps:
+            if not self._plausible(timeframe, gap_low, gap_high, data_dir, ranges):
+                results.append(None)
+                continue
+            rec = GapRecord(
+                id=f"G{self._last_id + len(recs) + 1:05d}",
+                timeframe=timeframe,
+                start_time=start_time.isoformat(),
+                gap_type=gap_type,
+                gap_low=float(gap_low),
+                gap_high=float(gap_high),
+                status='open',
+                found_time=found_iso,
+            )
+            recs.append(rec)
+            results.append(rec)
+        if recs:
+            self._append(recs)
+            for rec in recs:
+                logger.info(f"Recorded gap {rec.id} {rec.timeframe} {rec.gap_type} {rec.gap_low}-{rec.gap_high}")
+        return results
+
+    def _plausible(self, timeframe: str, gap_low, gap_high, data_dir: str, ranges: dict) -> bool:
         # Basic sanity: reasonable absolute price
         try:
             gl = float(gap_low)
             gh = float(gap_high)
         except Exception:
             logger.warning("add_gap: invalid gap_low/gap_high values, skipping record")
-            return None
+            return False
         # If values are non-positive, reject
         if gl <= 0 or gh <= 0:
             logger.warning(f"add_gap: gap values invalid ({gl}/{gh}), skipping record")
-            return None
+            return False
 
         # Compare to existing data for the timeframe if available
-        candidate = Path('data') / f"{self.csv_path.parent.parent.name.lower()}_{timeframe.lower()}_pionex.csv"
-        # better candidate: symbol-based
-        # Try to find a matching data file by timeframe within provided data_dir
-        candidate = None
-        for p in Path(data_dir).glob(f"*_{timeframe.lower()}_pionex.csv"):
-            candidate = p
-            break
-        if candidate and candidate.exists():
-            logger.debug(f"add_gap: checking data candidate {candidate}")
-            try:
-                df = pd.read_csv(candidate, index_col=0, parse_dates=True)
-                min_price_file = float(df['low'].min())
-                max_price_file = float(df['high'].max())
-                if gl < 0.5 * min_price_file or gh > 1.5 * max_price_file:
-                    logger.warning(f"add_gap: gap {gl}/{gh} outside data range {min_price_file}-{max_price_file}, skipping")
-                    return None
-            except Exception as e:
-                logger.debug(f"add_gap: failed to check data file {candidate}: {e}")
-
-        rec = GapRecord(
-            id=self._next_id(),
-            timeframe=timeframe,
-            start_time=start_time.isoformat(),
-            gap_type=gap_type,
-            gap_low=float(gap_low),
-            gap_high=float(gap_high),
-            status='open',
-            found_time=datetime.utcnow().isoformat(),
-        )
-        self._append(rec)
-        logger.info(f"Recorded gap {rec.id} {timeframe} {gap_type} {gap_low}-{gap_high}")
-        return rec
-
-    def _append(self, rec: GapRecord):
-        with open(self.csv_path, 'a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=list(asdict(rec).keys()))
-            writer.writerow(asdict(rec))
+        if timeframe not in ranges:
+            ranges[timeframe] = None
+            # Try to find a matching data file by timeframe within provided data_dir
+            candidate = None
+            for p in Path(data_dir).glob(f"*_{timeframe.lower()}_pionex.csv"):
+                candidate = p
+                break
+            if candidate and candidate.exists():
+                logger.debug(f"add_gap: checking data candidate {candidate}")
+                try:
+                    ranges[timeframe] = _price_envelope(candidate)
+                except Exception as e:
+                    logger.debug(f"add_gap: failed to check data file {candidate}: {e}")
+        if ranges[timeframe] is not None:
+            min_price_file, max_price_file = ranges[timeframe]
+            if gl < 0.5 * min_price_file or gh > 1.5 * max_price_file:
+                logger.warning(f"add_gap: gap {gl}/{gh} outside data range {min_price_file}-{max_price_file}, skipping")
+                return False
+        return True
+
+    def _append(self, recs: List[GapRecord]):
+        rows = self._read_all()
+        # plain attribute reads; asdict() would deep-copy every field
+        values = [[getattr(rec, n) for n in _FIELDNAMES] for rec in recs]
+        if self._append_fh is None:
+            # line-buffered so a crash loses at most the row being written
+            self._append_fh = open(self.csv_path, 'a', newline='', buffering=1)
+            self._writer = csv.writer(self._append_fh)
+        self._writer.writerows(values)
+        self._append_fh.flush()
+        for vals in values:
+            # keep the cache in the same all-strings form csv.DictReader produces
+            cached = {k: '' if v is None else str(v) for k, v in zip(_FIELDNAMES, vals)}
+            rows.append(cached)
+            self._index_row(cached)
+            self._open_by_tf.setdefault(cached['timeframe'], {})[cached['id']] = self._record(cached)
+        self._open_views = {}
+        self._rows_sig = self._sig()
 
     def update_gap_closed(self, gap_id: str, closed_time: datetime, close_price: float):
+        self.close_gaps({gap_id: close_price}, closed_time)
+
+    @_locked
+    def close_gaps(self, close_prices: dict, closed_time: datetime):
+        """Mark every open gap in `close_prices` (id -> close price) closed.
+
+        Only appends the closures to the side-log; the gaps CSV itself is untouched until compact().
+        """
+        self._read_all()
+        closed_iso = closed_time.isoformat()
+        closed = []
+        for gap_id, price in close_prices.items():
+            for r in self._by_id.get(gap_id, ()):
+                if r.get('status') == 'open':
+                    r['status'] = 'closed'
+                    r['closed_time'] = closed_iso
+                    r['close_price'] = f"{float(price):.8f}"
+                    closed.append(r)
+                    self._open_by_tf.get(r.get('timeframe'), {}).pop(gap_id, None)
+        if closed:
+            new_log = not self.closures_path.exists()
+            with open(self.closures_path, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=CLOSURE_FIELDS, extrasaction='ignore')
+                if new_log:
+                    writer.writeheader()
+                writer.writerows(closed)
+            self._open_views = {}
+            self._rows_sig = self._sig()
+            for r in closed:
+                logger.info(f"Gap {r['id']} marked closed at {closed_time} price {close_prices[r['id']]}")
+
+    @_locked
+    def compact(self):
+        """Fold the closures side-log into the gaps CSV (one full rewrite) and remove it."""
         rows = self._read_all()
-        updated = False
-        for r in rows:
-            if r.get('id') == gap_id and r.get('status') == 'open':
-                r['status'] = 'closed'
-                r['closed_time'] = closed_time.isoformat()
-                r['close_price'] = f"{float(close_price):.8f}"
-                updated = True
-        if updated:
-            # rewrite file
-            with open(self.csv_path, 'w', newline='') as f:
+        if not self.closures_path.exists():
+            return
+        self.close()
+        if rows:
+            # rewrite through a temp file; closures re-applied to already-closed rows
+            # are no-ops, so a crash before the unlink below loses nothing
+            tmp_path = self.csv_path.with_name(self.csv_path.name + '.tmp')
+            with open(tmp_path, 'w', newline='') as f:
                 writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
                 writer.writeheader()
                 writer.writerows(rows)
-            logger.info(f"Gap {gap_id} marked closed at {closed_time} price {close_price}")
+            os.replace(tmp_path, self.csv_path)
+        self.closures_path.unlink()
+        self._rows_sig = self._sig()
+
+    @_locked
+    def close(self):
+        """Close the append handle, if open. Later appends reopen it."""
+        if self._append_fh is not None:
+            self._append_fh.close()
+            self._append_fh = None
+            self._writer = None
+
+    @_locked
+    def list_open_gaps(self, timeframe: Optional[str] = None) -> List[GapRecord]:
+        """Open gaps (of `timeframe`, or all), grouped by timeframe, then in file order.
+
+        The records are kept between calls; treat them as read-only.
+        """
+        self._read_all()
+        if timeframe is not None:
+            return list(self._open_by_tf.get(timeframe, {}).values())
+        return [g for gaps in self._open_by_tf.values() for g in gaps.values()]
 
-    def list_open_gaps(self) -> List[GapRecord]:
-        rows = self._read_all()
-        return [GapRecord(**r) for r in rows if r.get('status') == 'open']
+    @_locked
+    def open_gap_view(self, timeframe: Optional[str] = None, gap_type: Optional[str] = None) -> OpenGaps:
+        """Open gaps (of `timeframe` and `gap_type`, or all) as parallel NumPy columns, for per-bar checks.
 
+        Views are cached per (timeframe, gap_type) until the gaps change. Unparseable
+        gap bounds come back as nan, so they never compare as hit.
+        """
+        self._read_all()
+        key = (timeframe, gap_type)
+        view = self._open_views.get(key)
+        if view is None:
+            open_gaps = self.list_open_gaps(timeframe)
+            if gap_type is not None:
+                open_gaps = [g for g in open_gaps if g.gap_type == gap_type]
+            view = self._open_views[key] = OpenGaps(
+                ids=[g.id for g in open_gaps],
+                timeframes=np.array([g.timeframe or '' for g in open_gaps], dtype=str),
+                gap_types=np.array([g.gap_type or '' for g in open_gaps], dtype=str),
+                gap_lows=np.array([g.gap_low for g in open_gaps], dtype=np.float64),
+                gap_highs=np.array([g.gap_high for g in open_gaps], dtype=np.float64),
+            )
+        return view
+
+    @_locked
     def sanitize_gaps(self, data_dir: str = 'data', min_price: float = 1000.0, low_factor: float = 0.5, high_factor: float = 1.5, dry_run: bool = False):
         """Sanitize gaps CSV by removing implausible or duplicate entries.
 
@@ -168,6 +455,8 @@ class GapManager:
         seen = set()
         removed = 0
         removed_rows = []
+        # timeframe -> its data file (or None), looked up once per call
+        candidates = {}
         for r in rows:
             # basic validation
             try:
@@ -191,15 +480,12 @@ class GapManager:
 
             # prefer to load the matching data file for the symbol/timeframe
             # Find any data file matching the timeframe pattern: *_<tf>_pionex.csv
-            candidate = None
-            for p in Path(data_dir).glob(f"*_{tf.lower()}_pionex.csv"):
-                candidate = p
-                break
+            if tf not in candidates:
+                candidates[tf] = next(Path(data_dir).glob(f"*_{tf.lower()}_pionex.csv"), None)
+            candidate = candidates[tf]
             if candidate and candidate.exists():
                 try:
-                    df = pd.read_csv(candidate, index_col=0, parse_dates=True)
-                    min_price_file = float(df['low'].min())
-                    max_price_file = float(df['high'].max())
+                    min_price_file, max_price_file = _price_envelope(candidate)
                     # if gap is outside reasonable envelope, remove
                     if g_low < low_factor * min_price_file or g_high > high_factor * max_price_file:
                         removed += 1
@@ -216,24 +502,289 @@ class GapManager:
             return {'removed': removed, 'rows': removed_rows}
 
         if removed > 0:
-            # backup the current gaps file before rewriting
+            # fold pending closures in first so the backup has them too
+            self.compact()
+            # backup the current gaps file before rewriting; the append handle would
+            # follow the renamed file, so drop it first
+            self.close()
             try:
-                ts = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+                ts = _utcnow().strftime('%Y%m%dT%H%M%SZ')
                 backup = self.csv_path.parent / f"gaps.backup.{ts}.csv"
                 Path(self.csv_path).rename(backup)
                 logger.info(f"Backed up gaps CSV to {backup}")
             except Exception:
                 logger.warning("Failed to create backup of gaps CSV before sanitizing")
             # rewrite file
-            from dataclasses import fields
             with open(self.csv_path, 'w', newline='') as f:
-                fieldnames = list(kept[0].keys()) if kept else [fld.name for fld in fields(GapRecord)]
+                fieldnames = list(kept[0].keys()) if kept else _FIELDNAMES
                 writer = csv.DictWriter(f, fieldnames=fieldnames)
                 writer.writeheader()
                 writer.writerows(kept)
+            self._rows = kept
+            # never hand out the ids of removed rows again
+            last_id = self._last_id
+            self._rebuild_index()
+            self._last_id = max(self._last_id, last_id)
+            self._rebuild_open()
+            self._open_views = {}
+            self._rows_sig = self._sig()
         return removed
 
 
+def _read_ohlcv_csv(path) -> pd.DataFrame:
+    """Read a downloader OHLCV CSV (time index in the first column) into a DataFrame.
+
+    Uses pyarrow's threaded CSV reader when pyarrow is installed and pandas' C parser
+    otherwise, with the price columns typed up front in both cases, so nothing is
+    inferred; both give a datetime64[ns] index and float64 columns (float32 would
+    round BTC prices to whole dollars).
+    """
+    if pv is None:
+        return pd.read_csv(path, index_col=0, parse_dates=True, dtype=OHLCV_DTYPES)
+    table = pv.read_csv(
+        path,
+        read_options=pv.ReadOptions(use_threads=True, block_size=1 << 20),
+        convert_options=pv.ConvertOptions(
+            column_types={c: pa.float64() for c in OHLCV_COLUMNS},
+            timestamp_parsers=['%Y-%m-%d %H:%M:%S', pv.ISO8601],
+        ),
+    )
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    df = df.set_index(df.columns[0])
+    df.index = pd.DatetimeIndex(pd.to_datetime(df.index)).as_unit('ns')
+    return df
+
+
+# bump when _read_ohlcv_csv's output changes in a way its bytecode doesn't show
+OHLCV_MIRROR_VERSION = 1
+
+
+def _load_ohlcv(path) -> pd.DataFrame:
+    """_read_ohlcv_csv, through a Parquet mirror of the CSV kept at `<path>.parquet`.
+
+    The mirror is read instead of the CSV while it was built from the CSV as it is now
+    (see parquet_mirror). Without pyarrow the CSV is parsed every time.
+    """
+    return mirrored_read(path, _read_ohlcv_csv, OHLCV_MIRROR_VERSION)
+
+
+# str(path) -> ((mtime_ns, size), (min low, max high)), see _price_envelope
+_ENVELOPES = {}
+
+
+def _price_envelope(path) -> tuple:
+    """Return (min low, max high) over an OHLCV CSV, parsing it again only after it changes."""
+    st = os.stat(path)
+    sig = (st.st_mtime_ns, st.st_size)
+    cached = _ENVELOPES.get(str(path))
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    if pl is not None:
+        # lazy scan: polars parses only the two columns and aggregates while streaming,
+        # never materializing the file
+        low, high = (pl.scan_csv(path, schema_overrides={'low': pl.Float64, 'high': pl.Float64})
+                     .select(pl.col('low').min(), pl.col('high').max())
+                     .collect()
+                     .row(0))
+        envelope = (float(low), float(high))
+        _ENVELOPES[str(path)] = (sig, envelope)
+        return envelope
+    # only the two columns the envelope needs, typed, without the time index
+    if pv is None:
+        df = pd.read_csv(path, usecols=['low', 'high'], dtype='float64')
+    else:
+        df = pv.read_csv(
+            path,
+            read_options=pv.ReadOptions(use_threads=True, block_size=1 << 20),
+            convert_options=pv.ConvertOptions(include_columns=['low', 'high'],
+                                              column_types={'low': pa.float64(), 'high': pa.float64()}),
+        ).to_pandas()
+    envelope = (float(df['low'].min()), float(df['high'].max()))
+    _ENVELOPES[str(path)] = (sig, envelope)
+    return envelope
+
+
+def _tail_csv(path, n_lines: int, chunk_size: int = 64 * 1024) -> bytes:
+    """Return the header line plus the last `n_lines` lines of a CSV file.
+
+    Reads backwards from EOF in `chunk_size` blocks, so the cost depends on
+    `n_lines`, not on the length of the file.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        pos = f.seek(0, os.SEEK_END)
+        buf = b''
+        # n_lines + 1 newlines guarantee n_lines complete lines after a partial first one
+        while pos > data_start and buf.count(b'\n') <= n_lines:
+            step = min(chunk_size, pos - data_start)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    lines = buf.splitlines()
+    if pos > data_start:
+        # the first line may have been cut mid-way
+        lines = lines[1:]
+    lines = [ln for ln in lines if ln.strip()][-n_lines:] if n_lines > 0 else []
+    if not header.endswith(b'\n'):
+        header += b'\n'
+    return header + b''.join(ln + b'\n' for ln in lines)
+
+
+# below this many bars _scan_gaps stays on NumPy: the few vector ops are already fast
+# and a first call would otherwise pay numba's compile (or cache load) time
+NUMBA_MIN_BARS = 1024
+
+
+def _scan_gaps(o, h, l, c, mode: str = 'strict'):
+    """Vectorized `GapStrategy._detect_gap` over every 3-bar window of the given bar arrays.
+
+    Returns (kind, gap_low, gap_high) arrays with one entry per window (len(o) - 2);
+    window i covers bars i, i+1, i+2 and kind is GAP_NONE / GAP_UP / GAP_DOWN.
+    Applies exactly the per-mode rules of _detect_gap. Uses the compiled single-pass
+    kernel for long inputs when numba is installed, NumPy column operations otherwise.
+    """
+    if NUMBA_AVAILABLE and len(o) >= NUMBA_MIN_BARS:
+        o, h, l, c = (np.ascontiguousarray(a, dtype=np.float64) for a in (o, h, l, c))
+        return scan_gaps_kernel(o, h, l, c, MODE_IDS.get(mode, MODE_BODY))
+
+    n = max(len(o) - 2, 0)
+    kind = np.full(n, GAP_NONE, dtype=np.int8)
+    gap_low = np.full(n, np.nan)
+    gap_high = np.full(n, np.nan)
+    if n == 0:
+        return kind, gap_low, gap_high
+
+    b1o, b1h, b1l, b1c = o[:-2], h[:-2], l[:-2], c[:-2]
+    b2o, b2h, b2l, b2c = o[1:-1], h[1:-1], l[1:-1], c[1:-1]
+    b3o, b3h, b3l, b3c = o[2:], h[2:], l[2:], c[2:]
+
+    if mode == 'b2dir':
+        up = (b2o < b2c) & (b3l > b1h)
+        down = (b2o > b2c) & (b3h < b1l)
+        up_lo, up_hi, down_lo, down_hi = b1h, b3l, b3h, b1l
+    elif mode == 'strict':
+        overlap = ~((b1h < b2l) | (b1l > b2h))
+        up = overlap & (b3l > b2h)
+        down = overlap & ~up & (b3h < b2l)
+        up_lo, up_hi, down_lo, down_hi = b2h, b3l, b3h, b2l
+    elif mode == 'open':
+        up = b3o > b2h
+        down = ~up & (b3o < b2l)
+        up_lo, up_hi, down_lo, down_hi = b2h, b3o, b3o, b2l
+    else:
+        # body mode: candle body ranges (same min/max tie behaviour as the scalar detector)
+        def body(op, cl):
+            return np.where(cl < op, cl, op), np.where(cl > op, cl, op)
+        b1_lo, b1_hi = body(b1o, b1c)
+        b2_lo, b2_hi = body(b2o, b2c)
+        b3_lo, b3_hi = body(b3o, b3c)
+        overlap = ~((b1_hi < b2_lo) | (b1_lo > b2_hi))
+        up = overlap & (b3_lo > b2_hi)
+        down = overlap & ~up & (b3_hi < b2_lo)
+        up_lo, up_hi, down_lo, down_hi = b2_hi, b3_lo, b3_hi, b2_lo
+
+    kind[up] = GAP_UP
+    kind[down] = GAP_DOWN
+    gap_low[up], gap_high[up] = up_lo[up], up_hi[up]
+    gap_low[down], gap_high[down] = down_lo[down], down_hi[down]
+    return kind, gap_low, gap_high
+
+
+class Notifier:
+    """Sends Discord messages for one strategy, optionally from a background thread.
+
+    Until `start()` is called, `send()` posts synchronously. Once started, `send()`
+    only queues the text and a worker thread posts it, joining messages that arrive
+    within `linger` seconds of each other (up to `max_len` characters) into one post,
+    which keeps bursts under Discord's webhook rate limit. `stop()` (also run at
+    interpreter exit) flushes the queue and ends the worker. The worker keeps one HTTP session (see
+    discord.messages.new_session) for its lifetime, so posts reuse a connection.
+    """
+
+    def __init__(self, strat: str = 'bitcoin-trader', max_pending: int = 100, max_len: int = 1800,
+                 linger: float = 1.5):
+        self.strat = strat
+        # Discord rejects content over 2000 characters; leave room for send_msg's provenance
+        self.max_len = max_len
+        self.linger = linger
+        self._q = queue.Queue(maxsize=max_pending)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            # the worker owns its session and closes it when it ends
+            self._thread = threading.Thread(target=self._worker, args=(new_session(),),
+                                            name='discord-notifier', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self, timeout: float = 10.0):
+        """Send whatever is still queued, then stop the worker (waits at most `timeout` seconds).
+
+        A worker still posting when the time is up is left to finish on its own (it is a
+        daemon thread, so it never holds up interpreter exit).
+        """
+        if self._thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self._q.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning('Discord queue still full at shutdown; unsent messages may be lost')
+        else:
+            self._thread.join(max(deadline - time.monotonic(), 0))
+            if self._thread.is_alive():
+                logger.warning('Discord notifier did not finish within the shutdown timeout')
+        self._thread = None
+        atexit.unregister(self.stop)
+
+    def send(self, text: str):
+        if self._thread is not None:
+            try:
+                self._q.put_nowait(text)
+                return
+            except queue.Full:
+                logger.warning('Discord queue full; sending synchronously')
+        send_msg(text, strat=self.strat)
+
+    def _worker(self, session):
+        try:
+            self._drain(session)
+        finally:
+            session.close()
+
+    def _drain(self, session):
+        stop = False
+        while not stop:
+            batch = [self._q.get()]
+            if batch[0] is None:
+                break
+            size = len(batch[0])
+            # coalesce whatever else arrives within the linger window into the same post
+            deadline = time.monotonic() + self.linger
+            while True:
+                try:
+                    text = self._q.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if text is None:
+                    stop = True
+                    break
+                if size + 1 + len(text) > self.max_len:
+                    self._post("\n".join(batch), session)
+                    batch, size = [], -1
+                batch.append(text)
+                size += 1 + len(text)
+            self._post("\n".join(batch), session)
+
+    def _post(self, text: str, session):
+        try:
+            send_msg(text, strat=self.strat, session=session)
+        except Exception as e:
+            logger.error(f'Error sending Discord message: {e}')
+
+
 class GapStrategy:
     """Main strategy implementation. Detects gaps and monitors them."""
 
@@ -249,12 +800,94 @@ class GapStrategy:
         self.timeframes = timeframes or ['60M', '4H', '1D']
         self.downloader = PionexDownloader(symbol=self.symbol, data_dir=data_dir)
         self.gap_mgr = GapManager()
+        # synchronous until main() starts its worker thread
+        self.notifier = Notifier()
         self.data_dir = data_dir
         self.recent_bars = recent_bars
         self.detector_mode = detector_mode
         self.display_tz = display_tz
         self.display_tz_format = display_tz_format
         self.summary_gap_type = summary_gap_type
+        # timeframe -> ((mtime_ns, size), sorted OHLCV frame, its (n, 4) float64 OHLC
+        # array or None until first needed) for the downloader's CSVs
+        self._df_cache = {}
+        # timeframe -> ((mtime_ns, size), rows read, time index, OHLC array) for the
+        # last rows of a CSV, read without parsing the whole file
+        self._tail_cache = {}
+        # timeframe -> (mtime_ns, size) of its CSV when process_interval last completed
+        self._last_processed = {}
+        # timeframe -> (time, open, high, low, close) of the newest bar process_interval
+        # handled; the downloader rewrites the CSV on every run, so the file signature
+        # alone can't tell that no bar has closed since
+        self._last_seen = {}
+        # timeframe -> text of the last Discord message process_interval sent
+        self._last_sent = {}
+
+    def _bars_path(self, timeframe: str) -> Path:
+        return Path(self.downloader.data_dir) / f"{self.symbol.lower()}_{timeframe.lower()}_pionex.csv"
+
+    def _bars_sig(self, timeframe: str):
+        try:
+            st = self._bars_path(timeframe).stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load_bars(self, timeframe: str) -> Optional[pd.DataFrame]:
+        """Return the time-sorted OHLCV frame for `timeframe`, or None if its CSV does not exist.
+
+        The frame is cached and only re-read when the file's mtime or size changes;
+        callers share it and must not modify it in place.
+        """
+        path = self._bars_path(timeframe)
+        sig = self._bars_sig(timeframe)
+        if sig is None:
+            self._df_cache.pop(timeframe, None)
+            return None
+        cached = self._df_cache.get(timeframe)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+        df = _load_ohlcv(path).sort_index()
+        self._df_cache[timeframe] = (sig, df, None)
+        return df
+
+    def _load_ohlc(self, timeframe: str):
+        """Return (time index, (n, 4) float64 open/high/low/close array) for `timeframe`, or None.
+
+        Built once per cached frame, so per-call scans only slice it.
+        """
+        df = self._load_bars(timeframe)
+        if df is None:
+            return None
+        sig, _, ohlc = self._df_cache[timeframe]
+        if ohlc is None:
+            ohlc = df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)
+            self._df_cache[timeframe] = (sig, df, ohlc)
+        return df.index, ohlc
+
+    def _load_tail_ohlc(self, timeframe: str, n: int):
+        """Like _load_ohlc, but only for the last `n` bars.
+
+        Slices the cached full frame when it is still current; otherwise parses just
+        the end of the CSV (the downloader keeps it sorted by time).
+        """
+        sig = self._bars_sig(timeframe)
+        if sig is None:
+            return None
+        cached = self._df_cache.get(timeframe)
+        if cached is not None and cached[0] == sig:
+            index, ohlc = self._load_ohlc(timeframe)
+            return index[-n:], ohlc[-n:]
+        tail = self._tail_cache.get(timeframe)
+        if tail is None or tail[0] != sig or tail[1] < n:
+            df = _read_ohlcv_csv(io.BytesIO(_tail_csv(self._bars_path(timeframe), n))).sort_index()
+            tail = (sig, n, df.index, df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64))
+            self._tail_cache[timeframe] = tail
+        return tail[2][-n:], tail[3][-n:]
+
+    def _invalidate_bars(self, timeframe: str):
+        self._df_cache.pop(timeframe, None)
+        self._tail_cache.pop(timeframe, None)
 
     def summarize_recent_gaps(self, timeframe: str, x: Optional[int] = None, mode: str = None, gap_type: Optional[str] = 'both'):
         """Summarize recent gaps, optionally filtering by gap type.
@@ -269,24 +902,27 @@ class GapStrategy:
         """
         x = x or self.recent_bars
         # Load last X bars from CSV for the timeframe
-        filename = Path(self.downloader.data_dir) / f"{self.symbol.lower()}_{timeframe.lower()}_pionex.csv"
-        if not filename.exists():
+        loaded = self._load_tail_ohlc(timeframe, x)
+        if loaded is None:
             return {'count': 0, 'gaps': []}
 
-        import pandas as pd
-        df = pd.read_csv(filename, index_col=0, parse_dates=True)
-        df = df.sort_index()
-        last = df.tail(x)
+        # evaluate every 3-bar window at once (same rules as _detect_gap, default mode 'strict')
+        times, bars = loaded
+        kind, gap_low, gap_high = _scan_gaps(bars[:, 0], bars[:, 1], bars[:, 2], bars[:, 3], mode=mode if mode is not None else 'strict')
+        # filter by requested gap_type
+        if gap_type == 'up':
+            hits = np.flatnonzero(kind == GAP_UP)
+        elif gap_type == 'down':
+            hits = np.flatnonzero(kind == GAP_DOWN)
+        elif gap_type in (None, 'both'):
+            hits = np.flatnonzero(kind != GAP_NONE)
+        else:
+            hits = np.empty(0, dtype=np.intp)
         gaps_found = []
-        # slide window of size 3
-        for i in range(2, len(last)):
-            window = last.iloc[i-2:i+1]
-            # pass mode if provided, otherwise let _detect_gap use its default
-            res = self._detect_gap(window, mode=mode) if mode is not None else self._detect_gap(window)
-            if res is not None:
-                # filter by requested gap_type
-                if gap_type in (None, 'both') or res['type'] == gap_type:
-                    gaps_found.append({'time': res['start_time'].isoformat(), 'type': res['type'], 'low': res['gap_low'], 'high': res['gap_high']})
+        # the gap's start time is the window's third bar
+        for i, ts in zip(hits.tolist(), times[hits + 2]):
+            gaps_found.append({'time': ts.to_pydatetime().isoformat(), 'type': 'up' if kind[i] == GAP_UP else 'down',
+                               'low': float(gap_low[i]), 'high': float(gap_high[i])})
         return {'count': len(gaps_found), 'gaps': gaps_found}
 
     def run_scan(self, timeframe: str, download_latest: bool = False, download_limit: int = 48, mode: str = None, gap_type: str = 'both', dry_run: bool = False, verbose: bool = False, output_file: str = None):
@@ -303,6 +939,15 @@ class GapStrategy:
         Returns a dict with keys: count, gaps, actions (list of action strings taken or previewed)
         """
         actions = []
+        # messages for newly recorded gaps, sent together once the scan is done
+        recorded_msgs = []
+        # output_file entries, written with a single open/write after the loop
+        out_chunks = []
+        # gaps to record, added with a single GapManager.add_gaps call after the loop
+        pending = []
+
+        def out_chunk(label, text, verbose_lines):
+            return f"{label}: {text}\n" + "".join(vl + "\n" for vl in verbose_lines) + "\n"
         # Optionally download latest bars
         if download_latest:
             try:
@@ -310,15 +955,16 @@ class GapStrategy:
                 actions.append(f"downloaded_latest:{download_limit}")
             except Exception as e:
                 actions.append(f"download_failed:{e}")
+            finally:
+                self._invalidate_bars(timeframe)
         # Summarize
         summary = self.summarize_recent_gaps(timeframe, x=self.recent_bars, mode=mode, gap_type=gap_type)
         # For each found gap, decide whether to record/send or preview
-        import pandas as pd
-        fname = Path(self.downloader.data_dir) / f"{self.symbol.lower()}_{timeframe.lower()}_pionex.csv"
         df_full = None
-        if verbose and fname.exists():
+        if verbose:
+            # same cached frame summarize_recent_gaps just used
             try:
-                df_full = pd.read_csv(fname, index_col=0, parse_dates=True).sort_index()
+                df_full = self._load_bars(timeframe)
             except Exception:
                 df_full = None
         for g in summary['gaps']:
@@ -334,68 +980,54 @@ class GapStrategy:
                     start = max(0, idx - 2)
                     window = df_full.iloc[start: idx + 1]
                     verbose_lines.append('Verbose: candidate window:')
-                    for ti, row in window.iterrows():
-                        verbose_lines.append(f"  {ti.isoformat()}  O:{row['open']} H:{row['high']} L:{row['low']} C:{row['close']}")
+                    for ti, o, h, l, c in window[['open', 'high', 'low', 'close']].itertuples(index=True, name=None):
+                        verbose_lines.append(f"  {ti.isoformat()}  O:{o} H:{h} L:{l} C:{c}")
                     det = self._detect_gap(window, mode=mode) if mode is not None else self._detect_gap(window)
                     verbose_lines.append(f"Verbose: detector output -> {det}")
                 except Exception as e:
                     verbose_lines.append(f"Verbose: failed to prepare window: {e}")
             # Check if already recorded
-            recorded = False
-            for r in self.gap_mgr._read_all():
-                r_tf = r.get('timeframe')
-                r_start = r.get('start_time') or r.get('start') or ''
-                try:
-                    r_dt = datetime.fromisoformat(r_start) if r_start else None
-                except Exception:
-                    r_dt = None
-                if r_tf == timeframe and r_dt is not None and r_dt == found_time:
-                    recorded = True
-                    break
+            recorded = self.gap_mgr.is_recorded(timeframe, found_time)
             preview = f"Found gap {timeframe} {g['type']} {g['low']} - {g['high']} at {g['time']}"
             if dry_run:
                 actions.append(f"DRY-RUN: {preview}")
                 if output_file:
-                    try:
-                        with open(output_file, 'a') as of:
-                            of.write(f"DRY-RUN: {preview}\n")
-                            for vl in verbose_lines:
-                                of.write(vl + "\n")
-                            of.write("\n")
-                    except Exception:
-                        pass
+                    out_chunks.append(out_chunk('DRY-RUN', preview, verbose_lines))
             else:
                 if not recorded:
-                    rec = self.gap_mgr.add_gap(timeframe, datetime.fromisoformat(g['time']), g['type'], g['low'], g['high'], data_dir=self.data_dir)
-                    if rec is None:
-                        actions.append(f"FILTERED_AS_IMPLAUSIBLE: {preview}")
-                        if output_file:
-                            try:
-                                with open(output_file, 'a') as of:
-                                    of.write(f"FILTERED_AS_IMPLAUSIBLE: {preview}\n")
-                                    for vl in verbose_lines:
-                                        of.write(vl + "\n")
-                                    of.write("\n")
-                            except Exception:
-                                pass
-                    else:
-                        msg = f"Gap found {rec.id} {timeframe} {g['type']} {g['low']} - {g['high']} at {g['time']}"
-                        actions.append(f"RECORDED: {msg}")
-                        send_msg(msg, strat='bitcoin-trader')
-                        if output_file:
-                            try:
-                                with open(output_file, 'a') as of:
-                                    of.write(f"RECORDED: {msg}\n")
-                                    for vl in verbose_lines:
-                                        of.write(vl + "\n")
-                                    of.write("\n")
-                            except Exception:
-                                pass
+                    # recorded in one batch below; keep this gap's slots in actions/out_chunks
+                    pending.append((len(actions), len(out_chunks) if output_file else None, g, found_time, preview, verbose_lines))
+                    actions.append(None)
+                    if output_file:
+                        out_chunks.append(None)
                 else:
                     actions.append(f"ALREADY_RECORDED: {preview}")
+        if pending:
+            recs = self.gap_mgr.add_gaps([(timeframe, found_time, g['type'], g['low'], g['high'])
+                                          for _, _, g, found_time, _, _ in pending], data_dir=self.data_dir)
+            for (ai, ci, g, _, preview, verbose_lines), rec in zip(pending, recs):
+                if rec is None:
+                    actions[ai] = f"FILTERED_AS_IMPLAUSIBLE: {preview}"
+                    if ci is not None:
+                        out_chunks[ci] = out_chunk('FILTERED_AS_IMPLAUSIBLE', preview, verbose_lines)
+                else:
+                    msg = f"Gap found {rec.id} {timeframe} {g['type']} {g['low']} - {g['high']} at {g['time']}"
+                    actions[ai] = f"RECORDED: {msg}"
+                    recorded_msgs.append(msg)
+                    if ci is not None:
+                        out_chunks[ci] = out_chunk('RECORDED', msg, verbose_lines)
+        if out_chunks:
+            try:
+                with open(output_file, 'a') as of:
+                    of.write("".join(out_chunks))
+            except Exception:
+                pass
+        if recorded_msgs:
+            self.notifier.send("\n".join(recorded_msgs))
         return {'count': summary['count'], 'gaps': summary['gaps'], 'actions': actions}
 
     def _fetch_last_n(self, interval: str, n: int = 3):
+        """Return (time of the last bar, (n, 4) float64 open/high/low/close array) for the last n bars, or None."""
         df = self.downloader.get_bars(interval=interval, limit=n)
         if df is None:
             return None
@@ -403,7 +1035,8 @@ class GapStrategy:
         df = df.sort_index()
         if len(df) < n:
             return None
-        return df.tail(n)
+        df = df.tail(n)
+        return df.index[-1], df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)
 
     def _detect_gap(self, df, mode: str = 'strict'):
         """Detects a gap using last three bars. Returns dict or None.
@@ -418,93 +1051,47 @@ class GapStrategy:
 
         Returns a dict with keys: type ('up'/'down'), gap_low, gap_high, start_time.
         """
-        b1, b2, b3 = df.iloc[0], df.iloc[1], df.iloc[2]
-
-        # compute full-range values
-        b1_low, b1_high = float(b1['low']), float(b1['high'])
-        b2_low, b2_high = float(b2['low']), float(b2['high'])
-        b3_low, b3_high = float(b3['low']), float(b3['high'])
-
-        def body_range(b):
-            return float(min(b['open'], b['close'])), float(max(b['open'], b['close']))
-
-        b1_low_b, b1_high_b = body_range(b1)
-        b2_low_b, b2_high_b = body_range(b2)
-        b3_low_b, b3_high_b = body_range(b3)
-
-        # New mode: use b2 direction and non-intersection between b3 and b1
-        if mode == 'b2dir':
-            # determine b2 direction by body
-            if float(b2['open']) < float(b2['close']):
-                # b2 is an up bar -> look for upward gap where b3 is entirely above b1
-                if b3_low > b1_high:
-                    return {'type': 'up', 'gap_low': float(b1_high), 'gap_high': float(b3_low), 'start_time': b3.name.to_pydatetime()}
-            elif float(b2['open']) > float(b2['close']):
-                # b2 is a down bar -> look for downward gap where b3 is entirely below b1
-                if b3_high < b1_low:
-                    return {'type': 'down', 'gap_low': float(b3_high), 'gap_high': float(b1_low), 'start_time': b3.name.to_pydatetime()}
-            return None
-
-        # For strict mode use full high/low; for body mode use body ranges
-        if mode == 'strict':
-            # overlap using full ranges
-            overlap = not (b1_high < b2_low or b1_low > b2_high)
-            if not overlap:
-                return None
-            # Up gap using full lows/highs
-            if b3_low > b2_high:
-                return {'type': 'up', 'gap_low': float(b2_high), 'gap_high': float(b3_low), 'start_time': b3.name.to_pydatetime()}
-            if b3_high < b2_low:
-                return {'type': 'down', 'gap_low': float(b3_high), 'gap_high': float(b2_low), 'start_time': b3.name.to_pydatetime()}
+        ohlc = df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)
+        return self._detect_gap_ohlc(ohlc[:3], df.index[2].to_pydatetime(), mode=mode)
+
+    def _detect_gap_ohlc(self, ohlc, start_time: datetime, mode: str = 'strict'):
+        """_detect_gap on a (3, 4) open/high/low/close array (b1, b2, b3); `start_time` is b3's time."""
+        (b1o, b1h, b1l, b1c), (b2o, b2h, b2l, b2c), (b3o, b3h, b3l, b3c) = ohlc.tolist()
+        kind, gap_low, gap_high = detect_gap_kernel(b1o, b1h, b1l, b1c, b2o, b2h, b2l, b2c, b3o, b3h, b3l, b3c,
+                                                    MODE_IDS.get(mode, MODE_BODY))
+        if kind == GAP_NONE:
             return None
+        return {'type': 'up' if kind == GAP_UP else 'down', 'gap_low': float(gap_low), 'gap_high': float(gap_high),
+                'start_time': start_time}
 
-        if mode == 'open':
-            # use open price of b3 compared to full b2 high/low
-            if b3['open'] > b2_high:
-                return {'type': 'up', 'gap_low': float(b2_high), 'gap_high': float(b3['open']), 'start_time': b3.name.to_pydatetime()}
-            if b3['open'] < b2_low:
-                return {'type': 'down', 'gap_low': float(b3['open']), 'gap_high': float(b2_low), 'start_time': b3.name.to_pydatetime()}
-            return None
-
-        # body mode (default if mode == 'body')
-        # overlap using body ranges
-        overlap = not (b1_high_b < b2_low_b or b1_low_b > b2_high_b)
-        if not overlap:
-            return None
-
-        if b3_low_b > b2_high_b:
-            return {'type': 'up', 'gap_low': float(b2_high_b), 'gap_high': float(b3_low_b), 'start_time': b3.name.to_pydatetime()}
-        if b3_high_b < b2_low_b:
-            return {'type': 'down', 'gap_low': float(b3_high_b), 'gap_high': float(b2_low_b), 'start_time': b3.name.to_pydatetime()}
-
-        return None
-
-    def _monitor_gaps_with_bar(self, interval: str, bar, notify_on_close: bool = True):
-        """Check open gaps for closure using the incoming bar (Series with open/high/low/close).
+    def _monitor_gaps_with_bar(self, interval: str, bar_low: float, bar_high: float, notify_on_close: bool = True,
+                               now: Optional[datetime] = None):
+        """Check open gaps for closure using the incoming bar's low and high.
         If notify_on_close is False, do not send Discord notifications on closure — print to terminal and log instead.
+        `now` (naive UTC, default: current time) is recorded as the closed time.
         """
-        open_gaps = self.gap_mgr.list_open_gaps()
-        for g in open_gaps:
-            if g.timeframe != interval:
-                continue
-            # up gap closes if bar.low <= gap_low
-            if g.gap_type == 'up' and bar['low'] <= float(g.gap_low):
-                self.gap_mgr.update_gap_closed(g.id, datetime.utcnow(), bar['low'])
-                msg = f"Gap closed {g.id} {interval} up gap filled at {bar['low']}"
-                if notify_on_close:
-                    send_msg(msg, strat='bitcoin-trader')
-                else:
-                    print(msg)
-                    logger.info(msg)
-            # down gap closes if bar.high >= gap_high
-            if g.gap_type == 'down' and bar['high'] >= float(g.gap_high):
-                self.gap_mgr.update_gap_closed(g.id, datetime.utcnow(), bar['high'])
-                msg = f"Gap closed {g.id} {interval} down gap filled at {bar['high']}"
-                if notify_on_close:
-                    send_msg(msg, strat='bitcoin-trader')
-                else:
-                    print(msg)
-                    logger.info(msg)     
+        up = self.gap_mgr.open_gap_view(interval, 'up')
+        down = self.gap_mgr.open_gap_view(interval, 'down')
+        # up gap closes if bar.low <= gap_low, down gap closes if bar.high >= gap_high
+        # (.tolist(): plain ints, so the loops below do no NumPy scalar indexing)
+        hits = [(up.ids[i], 'up', bar_low) for i in np.flatnonzero(bar_low <= up.gap_lows).tolist()]
+        hits += [(down.ids[i], 'down', bar_high) for i in np.flatnonzero(bar_high >= down.gap_highs).tolist()]
+        if not hits:
+            return
+        close_prices = {}
+        closed_lines = []
+        for gap_id, side, price in hits:
+            close_prices[gap_id] = price
+            closed_lines.append(f"Gap closed {gap_id} {interval} {side} gap filled at {price}")
+        # persist every closure from this bar with a single CSV write
+        self.gap_mgr.close_gaps(close_prices, now or _utcnow())
+        # every gap this bar closed goes out in one message
+        msg = "\n".join(closed_lines)
+        if notify_on_close:
+            self.notifier.send(msg)
+        else:
+            print(msg)
+            logger.info(msg)
 
     def process_interval(self, interval: str, notify_on_close: bool = True):
         logger.info(f"Processing interval {interval}")
@@ -514,15 +1101,36 @@ class GapStrategy:
             logger.debug(f"Downloaded latest bars for {interval} at start of process_interval")
         except Exception as e:
             logger.warning(f"Failed to download latest bars for {interval} at start of process_interval: {e}")
+        finally:
+            # the CSV may have grown; don't trust a frame cached before the download
+            self._invalidate_bars(interval)
+
+        # the download brought nothing new: detection, monitoring and the summary
+        # would only repeat the previous run
+        bars_sig = self._bars_sig(interval)
+        if bars_sig is not None and self._last_processed.get(interval) == bars_sig:
+            logger.info(f"No new data for {interval} since the last run; skipping")
+            return
 
-        df = self._fetch_last_n(interval, n=3)
-        if df is None:
+        last = self._fetch_last_n(interval, n=3)
+        if last is None:
             logger.debug(f"Not enough data for {interval}")
             return
+        last_time, ohlc = last
+        latest = (last_time, *ohlc[-1].tolist())
+        if self._last_seen.get(interval) == latest:
+            logger.debug(f"Newest {interval} bar unchanged since the last run; skipping")
+            self._last_processed[interval] = bars_sig
+            return
+        # one timestamp for everything this run records
+        now = _utcnow()
+        # detection and summary text for this interval, sent as a single Discord message
+        lines = []
         # Detect gap
-        gap = self._detect_gap(df, mode=self.detector_mode)
+        gap = self._detect_gap_ohlc(ohlc, last_time.to_pydatetime(), mode=self.detector_mode)
         if gap:
-            rec = self.gap_mgr.add_gap(interval, gap['start_time'], gap['type'], gap['gap_low'], gap['gap_high'], data_dir=self.data_dir)
+            rec = self.gap_mgr.add_gap(interval, gap['start_time'], gap['type'], gap['gap_low'], gap['gap_high'], data_dir=self.data_dir,
+                                       found_time=now)
             if rec is None:
                 logger.info(f"Gap at {interval} {gap['start_time']} filtered as implausible; not recorded or notified")
             else:
@@ -531,7 +1139,6 @@ class GapStrategy:
                     dt = datetime.fromisoformat(rec.start_time)
                     date_str = dt.strftime('%d%b%y').upper()
                     # treat stored timestamps as UTC if naive; show both UTC and configured display tz
-                    from datetime import timezone
                     if dt.tzinfo is None:
                         dt_utc = dt.replace(tzinfo=timezone.utc)
                     else:
@@ -553,12 +1160,12 @@ class GapStrategy:
                         when = f"@{date_str} - {utc_str} ({local_str})"
                 except Exception:
                     when = f"@{rec.start_time}"
-                send_msg(f"Gap found {rec.id} {interval} {gap['type']} {gap['gap_low']} - {gap['gap_high']} {when}", strat='bitcoin-trader')
+                lines.append(f"Gap found {rec.id} {interval} {gap['type']} {gap['gap_low']} - {gap['gap_high']} {when}")
         # Monitor existing gaps using most recent bar
-        latest_bar = df.iloc[-1]
-        self._monitor_gaps_with_bar(interval, latest_bar, notify_on_close) 
+        _, bar_high, bar_low, _ = ohlc[-1].tolist()
+        self._monitor_gaps_with_bar(interval, bar_low, bar_high, notify_on_close, now=now)
 
-        # Summarize recent gaps over the last X bars and send a Discord message with history
+        # Summarize recent gaps over the last X bars and add the history to the message
         try:
             # Use the strategy's configured detector mode for summaries so summary results match detection
             summary = self.summarize_recent_gaps(interval, x=self.recent_bars, mode=self.detector_mode, gap_type=getattr(self,'summary_gap_type','both'))
@@ -567,37 +1174,57 @@ class GapStrategy:
                 msg = f"No gaps found in the last {self.recent_bars} bars for {interval}."
             else:
                 # Build a more detailed summary listing times and low/high for each gap
-                gap_lines = []
-                for g in summary['gaps']:
-                    # format the stored ISO time into UTC and the configured display timezone for clarity
-                    try:
-                        dt_g = datetime.fromisoformat(g['time'])
-                        from datetime import timezone
-                        if dt_g.tzinfo is None:
-                            dt_utc_g = dt_g.replace(tzinfo=timezone.utc)
-                        else:
-                            dt_utc_g = dt_g.astimezone(timezone.utc)
-                        if getattr(self, 'display_tz', None) is not None:
-                            try:
-                                local_g = dt_utc_g.astimezone(self.display_tz)
-                            except Exception:
-                                local_g = dt_utc_g.astimezone()
-                        else:
-                            local_g = dt_utc_g.astimezone()
-                        utc_str_g = dt_utc_g.strftime('%Y-%m-%dT%H:%M:%S UTC')
-                        local_str_g = local_g.strftime('%Y-%m-%dT%H:%M:%S %Z')
-                        time_str = f"{utc_str_g} ({local_str_g})"
-                    except Exception:
-                        time_str = g['time']
-                    gap_lines.append(f"{time_str} {g['type'].upper()} low={g['low']} high={g['high']}")
+                display_tz = getattr(self, 'display_tz', None)
+                # stored ISO times shown in UTC and the configured display timezone for clarity
+                gap_lines = [f"{_format_gap_time(g['time'], display_tz)} {g['type'].upper()} low={g['low']} high={g['high']}"
+                             for g in summary['gaps']]
                 msg = f"{count} gaps in the last {self.recent_bars} bars for {interval}:\n" + "\n".join(gap_lines)
-            send_msg(msg, strat='bitcoin-trader')
+            lines.append(msg)
         except Exception as e:
             logger.error(f"Error summarizing recent gaps for {interval}: {e}")
 
+        text = "\n".join(lines)
+        if text and text != self._last_sent.get(interval):
+            self.notifier.send(text)
+            self._last_sent[interval] = text
+        self._last_processed[interval] = bars_sig
+        self._last_seen[interval] = latest
+
+
+@functools.lru_cache(maxsize=1024)
+def _format_gap_time(iso_str: str, display_tz=None) -> str:
+    """Format a stored ISO time (naive = UTC) as 'UTC (display tz)' for summary messages.
+
+    `display_tz` None means the system local timezone. Summaries repeat the same
+    recent bar times run after run, so results are cached.
+    """
+    try:
+        dt = datetime.fromisoformat(iso_str)
+        if dt.tzinfo is None:
+            dt_utc = dt.replace(tzinfo=timezone.utc)
+        else:
+            dt_utc = dt.astimezone(timezone.utc)
+        if display_tz is not None:
+            try:
+                local = dt_utc.astimezone(display_tz)
+            except Exception:
+                local = dt_utc.astimezone()
+        else:
+            local = dt_utc.astimezone()
+        return f"{dt_utc.strftime('%Y-%m-%dT%H:%M:%S UTC')} ({local.strftime('%Y-%m-%dT%H:%M:%S %Z')})"
+    except Exception:
+        return iso_str
+
+
+# start of every countdown redraw: clear the screen, cursor home, then the title line
+COUNTDOWN_HEADER = "\033[2J\033[HNext Data Download:\n"
 
+
+@functools.lru_cache(maxsize=64)
 def _parse_display_tz(tzstr: str):
-    # Accept IANA zone names like 'Europe/Berlin' or offsets like 'UTC+1'/'UTC-1'
+    # Accept IANA zone names like 'Europe/Berlin' or offsets like 'UTC+1'/'UTC-1'.
+    # Pure (the caller logs unrecognized names), so results are cached; tzinfo
+    # instances from ZoneInfo/timezone are immutable and safe to share.
     from datetime import timezone, timedelta
     try:
         from zoneinfo import ZoneInfo
@@ -670,26 +1297,54 @@ def main():
     # Send start message
     send_msg(f"Bitcoin gap monitor started (recent_bars={strategy.recent_bars}, detector_mode={strategy.detector_mode}, display_tz={getattr(strategy,'display_tz',None)})", strat='bitcoin-trader')
 
-    # Schedule jobs
+    # from here on, Discord posts go out from a worker thread instead of the scheduler loop
+    strategy.notifier.start()
+
+    # the timeframes are independent and mostly wait on the network, so they run on
+    # worker threads, side by side; the scheduler loop itself never blocks on a download
+    pool = ThreadPoolExecutor(max_workers=len(strategy.timeframes), thread_name_prefix='tf')
+
+    def _run_interval(tf):
+        try:
+            strategy.process_interval(tf)
+        except Exception:
+            logger.exception(f'Processing {tf} failed')
+
+    def _submit(tf):
+        pool.submit(_run_interval, tf)
+
+    # Schedule jobs, keeping each timeframe's jobs for the countdown display
+    tf_jobs = {}
     # 60M: every hour at :02
-    schedule.every().hour.at(':02').do(strategy.process_interval, '60M')
+    tf_jobs['60M'] = [schedule.every().hour.at(':02').do(_submit, '60M')]
     # 4H: every 4 hours at 00:06, 04:06, ... (approx)
-    for hour in [0, 4, 8, 12, 16, 20]:
-        schedule.every().day.at(f"{hour:02d}:06").do(strategy.process_interval, '4H')
+    tf_jobs['4H'] = [schedule.every().day.at(f"{hour:02d}:06").do(_submit, '4H')
+                     for hour in [0, 4, 8, 12, 16, 20]]
     # 1D: daily at 00:12
-    schedule.every().day.at('00:12').do(strategy.process_interval, '1D')
+    tf_jobs['1D'] = [schedule.every().day.at('00:12').do(_submit, '1D')]
 
     # Run an initial pass (do not send Discord notifications for closures on startup — print instead)
-    for tf in strategy.timeframes:
-        strategy.process_interval(tf, notify_on_close=False)
-        time.sleep(1)
+    list(pool.map(lambda tf: strategy.process_interval(tf, notify_on_close=False), strategy.timeframes))
+
+    # Clean shutdown handling: the signal handler only raises a flag; the loop below
+    # notices it (its wait wakes up immediately) and shuts down in normal call context,
+    # so a second Ctrl+C can't interrupt the cleanup halfway
+    shutdown_requested = threading.Event()
+
+    def _request_shutdown(signum, frame):
+        shutdown_requested.set()
 
-    # Clean shutdown handling
-    def _shutdown(signum, frame):
+    def _shutdown():
         logger.info('Shutting down...')
-        # Prevent re-entrant signals from interrupting the notification send
-        signal.signal(signal.SIGINT, signal.SIG_IGN)
-        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        # let running timeframe jobs finish; drop ones that have not started
+        pool.shutdown(wait=True, cancel_futures=True)
+        try:
+            strategy.gap_mgr.compact()
+        except Exception as e:
+            logger.error(f'Failed to compact gaps CSV: {e}')
+        strategy.gap_mgr.close()
+        # flush queued notifications before the final one
+        strategy.notifier.stop()
         try:
             sent = send_msg('Bitcoin gap monitor stopped', strat='bitcoin-trader', timeout=5)
             if not sent:
@@ -701,56 +1356,70 @@ def main():
             print('\n')
             sys.exit(0)
 
-    signal.signal(signal.SIGINT, _shutdown)
-    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _request_shutdown)
+    signal.signal(signal.SIGTERM, _request_shutdown)
 
     # Loop with a visible countdown in attached terminals
     logger.info('Scheduler started. Press Ctrl+C to stop.')
+    # the countdown is only drawn on a terminal (not when stdout is a log file), and
+    # only shows hours:minutes, so redraw only when those minutes change
+    show_countdown = sys.stdout.isatty()
+    # loop-invariant: configured timeframe order and the per-timeframe line format
+    tfs = tuple(strategy.timeframes)
+    line_fmt = "- {}: {:02d}:{:02d} hr:min\n".format
+    last_display = None
+    next_runs = None
     try:
-        while True:
-            # Display per-timeframe countdowns to the next scheduled job run
-            now = datetime.utcnow()
-            # Find the minimum next_run for each timeframe (jobs can be duplicated)
-            next_by_tf = {}
-            for job in schedule.jobs:
-                try:
-                    args = getattr(job.job_func, 'args', None) or getattr(job, 'args', None)
-                    tf = args[0] if args else None
-                except Exception:
-                    tf = None
-                if tf is None:
-                    continue
-                if getattr(job, 'next_run', None):
-                    delta = (job.next_run - now).total_seconds()
-                    if delta < 0:
-                        delta = 0
-                    prev = next_by_tf.get(tf)
-                    if prev is None or delta < prev:
-                        next_by_tf[tf] = delta
-
-            lines = ['Next Data Download:']
-            # Keep configured timeframes ordering when possible
-            for tf in strategy.timeframes:
-                secs = int(next_by_tf.get(tf, 0))
-                hours = secs // 3600
-                mins = (secs % 3600) // 60
-                lines.append(f"- {tf}: {hours:02d}:{mins:02d} hr:min")
-
-            # Clear screen (simple) and print the multi-line status so tmux shows a live countdown block
-            try:
-                print("\033[2J\033[H", end='')
-            except Exception:
-                pass
-            print("\n".join(lines))
-            print(f"Time: {datetime.utcnow().isoformat()}\n", end='', flush=True)
+        while not shutdown_requested.is_set():
+            if show_countdown:
+                # one timestamp per tick for the countdown and the status line
+                now_utc = datetime.now(timezone.utc)
+                # Display per-timeframe countdowns to the next scheduled job run
+                # (schedule keeps next_run as naive local time)
+                now = now_utc.astimezone().replace(tzinfo=None)
+                # The minimum next_run for each timeframe (4H has several jobs) only moves
+                # when one of its jobs runs, so recompute it only once the earliest is due
+                if next_runs is None or (next_runs and now >= min(next_runs.values())):
+                    next_runs = {}
+                    for tf, jobs in tf_jobs.items():
+                        next_run = min((j.next_run for j in jobs if j.next_run), default=None)
+                        if next_run is not None:
+                            next_runs[tf] = next_run
+                next_by_tf = {tf: max((next_run - now).total_seconds(), 0) for tf, next_run in next_runs.items()}
+
+                # whole minutes left per timeframe, in configured order: all the display shows
+                display = tuple(int(next_by_tf.get(tf, 0)) // 60 for tf in tfs)
+
+                if display != last_display:
+                    lines = [COUNTDOWN_HEADER]
+                    for tf, mins_left in zip(tfs, display):
+                        lines.append(line_fmt(tf, *divmod(mins_left, 60)))
+                    lines.append(f"Time: {now_utc.isoformat()}\n")
+                    # Clear screen (simple) and write the multi-line status in one go so tmux
+                    # shows a live countdown block
+                    sys.stdout.write("".join(lines))
+                    sys.stdout.flush()
+                    last_display = display
 
             # Execute any pending jobs (this will also emit log lines)
             schedule.run_pending()
 
-            # Sleep briefly to update the status frequently without excessive CPU usage
-            time.sleep(1)
+            # Sleep until the next job is due or the countdown's minute rolls over,
+            # capped to bound drift (30s with a countdown, 60s without);
+            # SIGINT/SIGTERM end the wait early
+            if show_countdown:
+                # re-read the clock: the jobs above may have run for a while
+                now = datetime.now()
+                timeout = min(30.0, 60 - now.second - now.microsecond / 1e6)
+            else:
+                timeout = 60.0
+            idle = schedule.idle_seconds()
+            if idle is not None:
+                timeout = min(timeout, idle)
+            shutdown_requested.wait(max(timeout, 0.1))
     except KeyboardInterrupt:
-        _shutdown(None, None)
+        pass
+    _shutdown()
 
 
 if __name__ == '__main__':
@@ -5,14 +5,18 @@ Discord message delete utility (moved to discord_tools/)
 This file was moved from the project root into its own folder. See README.md
 next to this file for usage and token placement instructions.
 """
+import functools
 import os
 import sys
 import sysconfig
 import logging
 import importlib
 import importlib.util
+import importlib.machinery
 from dotenv import load_dotenv
 
+PROJ_ROOT = os.path.abspath(os.path.dirname(__file__))
+
 
 def _ensure_installed_discord_package():
     """Ensure we import the installed `discord` package (discord.py) even if a local
@@ -21,36 +25,21 @@ def _ensure_installed_discord_package():
     try:
         import discord as _d
         mod_file = getattr(_d, '__file__', '')
-        proj_root = os.path.abspath(os.path.dirname(__file__))
-        if mod_file and not os.path.abspath(mod_file).startswith(proj_root):
+        if mod_file and not os.path.abspath(mod_file).startswith(PROJ_ROOT):
             return
     except Exception:
         pass
 
-    proj_root = os.path.abspath(os.path.dirname(__file__))
-    candidate = None
-    for p in sys.path:
-        if not p:
-            continue
-        p_abs = os.path.abspath(p)
-        if p_abs == proj_root:
-            continue
-        discord_init = os.path.join(p_abs, 'discord', '__init__.py')
-        if os.path.isfile(discord_init):
-            candidate = discord_init
-            break
-
-    if not candidate:
-        purelib = sysconfig.get_paths().get('purelib')
-        if purelib:
-            discord_init = os.path.join(purelib, 'discord', '__init__.py')
-            if os.path.isfile(discord_init):
-                candidate = discord_init
-
-    if not candidate:
+    # one spec lookup over sys.path without the project root, through the path
+    # importer caches rather than a stat per entry; purelib is the last resort
+    search_path = [p for p in sys.path if p and os.path.abspath(p) != PROJ_ROOT]
+    purelib = sysconfig.get_paths().get('purelib')
+    if purelib:
+        search_path.append(purelib)
+    spec = importlib.machinery.PathFinder.find_spec('discord', search_path)
+    if spec is None or spec.loader is None:
         return
 
-    spec = importlib.util.spec_from_file_location('discord', candidate)
     module = importlib.util.module_from_spec(spec)
     sys.modules['discord'] = module
     try:
@@ -64,16 +53,12 @@ _ensure_installed_discord_package()
 
 
 def _import_installed_discord():
-    import os, sys, importlib.util
-
-    proj_root = os.path.abspath(os.path.dirname(__file__))
     removed = []
     try:
         for i, p in enumerate(list(sys.path)):
             if not p:
                 continue
-            p_abs = os.path.abspath(p)
-            if p_abs == proj_root:
+            if os.path.abspath(p) == PROJ_ROOT:
                 removed.append((i, p))
                 sys.path.remove(p)
 
@@ -140,28 +125,49 @@ intents.message_content = True
 bot = commands.Bot(command_prefix="!", intents=intents)
 
 
+# guild id -> {text channel name: channel}, built on first lookup and dropped
+# whenever a channel in that guild is created, deleted or changed
+_CHANNEL_BY_NAME = {}
+
+
+def _channels_by_name(guild):
+    channels = _CHANNEL_BY_NAME.get(guild.id)
+    if channels is None:
+        channels = {}
+        for ch in guild.text_channels:
+            # first match wins on duplicate names, like discord.utils.get
+            channels.setdefault(ch.name, ch)
+        _CHANNEL_BY_NAME[guild.id] = channels
+    return channels
+
+
 @bot.event
 async def on_ready():
     logger.info(f'Logged in as {bot.user} (id: {bot.user.id})')
+    _CHANNEL_BY_NAME.clear()
+    for guild in bot.guilds:
+        _channels_by_name(guild)
 
 
-def resolve_channel(guild, channel_key: str):
-    if not channel_key:
-        return None
+@bot.event
+async def on_guild_channel_create(channel):
+    _CHANNEL_BY_NAME.pop(channel.guild.id, None)
 
-    key = channel_key.strip()
-    possible_names = []
-    if key in ("paper-stop-hunter", "live-stop-hunter"):
-        possible_names.append(key)
-    else:
-        possible_names.append(key)
 
-    for name in possible_names:
-        ch = discord.utils.get(guild.text_channels, name=name)
-        if ch:
-            return ch
+@bot.event
+async def on_guild_channel_delete(channel):
+    _CHANNEL_BY_NAME.pop(channel.guild.id, None)
 
-    return None
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    _CHANNEL_BY_NAME.pop(after.guild.id, None)
+
+
+def resolve_channel(guild, channel_key: str):
+    if not channel_key:
+        return None
+    return _channels_by_name(guild).get(channel_key.strip())
 
 
 @bot.command(name="clear")
@@ -199,20 +205,23 @@ async def clear_error(ctx, error):
         await ctx.send(f"Error: {error}", delete_after=10)
 
 
-def main():
-    IN_FILE_TOKEN = 'REPLACE_ME_WITH_YOUR_BOT_TOKEN'
+# paste a token here to skip .secret_token / the environment
+IN_FILE_TOKEN = 'REPLACE_ME_WITH_YOUR_BOT_TOKEN'
+
 
+@functools.lru_cache(maxsize=1)
+def _load_token():
+    """Bot token from .secret_token (first non-comment line), IN_FILE_TOKEN, or the environment."""
     token = None
-    secret_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), '.secret_token')
+    secret_path = os.path.join(PROJ_ROOT, '.secret_token')
     try:
-        if os.path.isfile(secret_path):
-            with open(secret_path, 'r') as f:
-                for raw_line in f:
-                    line = raw_line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    token = line
-                    break
+        with open(secret_path, 'r') as f:
+            text = f.read()
+        for raw_line in text.splitlines():
+            line = raw_line.strip()
+            if line and not line.startswith('#'):
+                token = line
+                break
     except Exception:
         pass
 
@@ -222,6 +231,11 @@ def main():
     if isinstance(token, str):
         token = token.strip()
         token = token.replace('\n', '').replace('\r', '')
+    return token or None
+
+
+def main():
+    token = _load_token()
 
     if not token:
         logger.error('No Discord bot token found. Please set .secret_token in this folder, IN_FILE_TOKEN in this file, or DISCORD_BOT_TOKEN/discord_key in the environment.')
@@ -232,11 +246,8 @@ def main():
 
 def _find_channel_by_name_or_key(guild, name_or_key: str):
     """Helper used by CLI to resolve channel in a guild."""
-    # Check project keys
-    if name_or_key in ("paper-stop-hunter", "live-stop-hunter"):
-        return discord.utils.get(guild.text_channels, name=name_or_key)
-    # otherwise try exact name
-    return discord.utils.get(guild.text_channels, name=name_or_key)
+    # project keys ("paper-stop-hunter", "live-stop-hunter") are channel names too
+    return _channels_by_name(guild).get(name_or_key)
 
 
 async def _cli_purge(token: str, guild_id: int, channel_name_or_key: str, amount: int, dry_run: bool):
@@ -301,28 +312,7 @@ def run_cli_mode(args):
     parser.add_argument('--confirm', action='store_true', help='Actually perform the deletion (otherwise dry-run)')
     parsed = parser.parse_args(args)
 
-    # Load token same way as main
-    IN_FILE_TOKEN = 'REPLACE_ME_WITH_YOUR_BOT_TOKEN'
-    token = None
-    secret_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), '.secret_token')
-    try:
-        if os.path.isfile(secret_path):
-            with open(secret_path, 'r') as f:
-                for raw_line in f:
-                    line = raw_line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    token = line
-                    break
-    except Exception:
-        pass
-
-    if not token:
-        token = IN_FILE_TOKEN if IN_FILE_TOKEN and IN_FILE_TOKEN != 'REPLACE_ME_WITH_YOUR_BOT_TOKEN' else (os.getenv('DISCORD_BOT_TOKEN') or os.getenv('discord_key'))
-
-    if isinstance(token, str):
-        token = token.strip()
-        token = token.replace('\n', '').replace('\r', '')
+    token = _load_token()
 
     if not token:
         logger.error('No token available for CLI mode')
@@ -1,8 +1,15 @@
 # import sys
 # sys.path.append('../')
 import requests 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
+import asyncio
 import os
+import socket
+import sys
+import time
+from pathlib import Path
 import discord
 import logging
 
@@ -13,35 +20,105 @@ load_dotenv()
 
 # Access variables from the .env file
 discord_key = os.getenv('discord_key')
+_HEADERS = {"Authorization": discord_key}
 
 # Configure logging for discord_msgs
 logger = logging.getLogger(__name__)
 
-def send_msg(msg, strat='orb', toPrint=False, timeout=5, include_provenance=True):
+# Discord webhook per strategy name
+_WEBHOOKS = {
+    'bitcoin-trader': "https://discord.com/api/webhooks/1452228163580198943/RPYtHFA79iJ31qKotlDkhNmzkuJcEyLDVoDshsTQMF5qPqh7flHbXbsOIk2Xm1-4Km20",
+}
+
+# provenance parts that don't change while the process runs
+try:
+    _SCRIPT = Path(sys.argv[0]).name if len(sys.argv) > 0 else ''
+    _HOST = socket.gethostname()
+except Exception:
+    _SCRIPT = _HOST = None
+
+def _build_provenance():
+    """' [src:... pid:... host:...]' suffix for sent messages ('' if the host is unknown)."""
+    global _PROV
+    _PROV = f" [src:{_SCRIPT} pid:{os.getpid()} host:{_HOST}]" if _HOST is not None else ''
+
+_build_provenance()
+# a forked child has its own pid
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_build_provenance)
+
+def new_session(pool_maxsize=1, retries=3):
+    """Create a requests.Session for repeated send_msg calls.
+
+    Keeps pooled connections to Discord alive between messages, so only the first
+    send pays for the TCP/TLS handshake; failed connects are retried up to `retries`
+    times with backoff.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=Retry(total=retries, backoff_factor=0.5))
+    session.mount('https://', adapter)
+    return session
+
+# how often send_msg waits out a 429 (rate limited) answer before giving up, and the
+# longest wait it accepts
+RATE_LIMIT_RETRIES = 2
+RATE_LIMIT_MAX_WAIT = 10.0
+
+def _retry_after(res):
+    """Seconds Discord asked us to wait in a 429 response, or None if it didn't say."""
+    try:
+        return float(res.json()['retry_after'])
+    except Exception:
+        pass
+    try:
+        return float(res.headers['Retry-After'])
+    except Exception:
+        return None
+
+# webhook url -> (requests left in Discord's current rate-limit bucket, time.monotonic()
+# at which it resets), from the X-RateLimit-* headers of the last response
+_RATE_STATE = {}
+
+def _note_rate_limit(url, res):
+    try:
+        remaining = int(res.headers['X-RateLimit-Remaining'])
+        reset_after = float(res.headers['X-RateLimit-Reset-After'])
+    except Exception:
+        return
+    _RATE_STATE[url] = (remaining, time.monotonic() + reset_after)
+
+def _wait_for_rate_limit(url):
+    """Sleep until the webhook's bucket resets if the last response said it is empty.
+
+    Waits longer than RATE_LIMIT_MAX_WAIT are not taken; the post then goes out and any
+    429 is handled as usual.
+    """
+    state = _RATE_STATE.get(url)
+    if state is None or state[0] > 0:
+        return
+    wait = state[1] - time.monotonic()
+    if 0 < wait <= RATE_LIMIT_MAX_WAIT:
+        logger.info(f'Discord rate limit bucket empty; waiting {wait:.2f}s')
+        time.sleep(wait)
+
+# shared by every send_msg call that doesn't pass its own session; a few connections
+# since callers may send from several threads, and no retries so a failing send
+# returns as quickly as it used to
+_SESSION = new_session(pool_maxsize=4, retries=0)
+
+def send_msg(msg, strat='orb', toPrint=False, timeout=5, include_provenance=True, session=None):
     """Send a Discord message via webhook.
 
     If include_provenance is True, the message will be appended with a short provenance
     string containing the script name, PID, and hostname to help trace which process
     sent the notification.
+    Requests go through `session` (see new_session) if given, else a shared module-level
+    session, so connections are reused between messages.
     """
     # print(f'sending message: {msg}')
 
-    # Build provenance string when requested
-    prov_str = ''
-    if include_provenance:
-        try:
-            import sys
-            import socket
-            from pathlib import Path
-            script = Path(sys.argv[0]).name if len(sys.argv) > 0 else ''
-            prov_str = f" [src:{script} pid:{os.getpid()} host:{socket.gethostname()}]"
-        except Exception:
-            prov_str = ''
-
-    bot_url = None
-    if strat == 'bitcoin-trader':
-        bot_url = "https://discord.com/api/webhooks/1452228163580198943/RPYtHFA79iJ31qKotlDkhNmzkuJcEyLDVoDshsTQMF5qPqh7flHbXbsOIk2Xm1-4Km20"
-    else:
+    bot_url = _WEBHOOKS.get(strat)
+    if bot_url is None and strat not in _WEBHOOKS:
         logger.warning(f'Unknown strategy "{strat}" for Discord message: {msg}')
         return False
 
@@ -49,17 +126,28 @@ def send_msg(msg, strat='orb', toPrint=False, timeout=5, include_provenance=True
         logger.error(f'No Discord webhook URL configured for strategy "{strat}"')
         return False
 
-    content = f"{msg}{prov_str}"
+    content = f"{msg}{_PROV}" if include_provenance else f"{msg}"
     payload = {
         "content": content,
     }
 
-    headers = {
-        "Authorization": discord_key
-    }
+    headers = _HEADERS
     try:
         # Use a short timeout to avoid shutdown blocking indefinitely
-        res = requests.post(bot_url, json=payload, headers=headers, timeout=timeout)
+        post = (session or _SESSION).post
+        _wait_for_rate_limit(bot_url)
+        res = post(bot_url, json=payload, headers=headers, timeout=timeout)
+        _note_rate_limit(bot_url, res)
+        for _ in range(RATE_LIMIT_RETRIES):
+            if res.status_code != 429:
+                break
+            wait = _retry_after(res)
+            if wait is None or wait > RATE_LIMIT_MAX_WAIT:
+                break
+            logger.warning(f'Discord rate limit hit; retrying in {wait:.2f}s')
+            time.sleep(wait)
+            res = post(bot_url, json=payload, headers=headers, timeout=timeout)
+            _note_rate_limit(bot_url, res)
         if res.status_code not in [200, 204]:
             logger.error(f'Discord API error: {res.status_code} - {res.text}')
             return False
@@ -146,9 +234,9 @@ async def notify_partial_fill(
         f"Position ID: `{position_id}`"
     )
     
-    # send_msg is synchronous, but we can wrap it or just call it 
-    # (requests.post blocks, but likely fast enough for this alert)
-    send_msg(message, strat='auto-trader-pro')
+    # send_msg blocks on requests.post; run it in a worker thread so the event
+    # loop keeps serving other coroutines for the network round trip
+    await asyncio.to_thread(send_msg, message, strat='auto-trader-pro')
     logger.info(f"Sent partial fill notification for {position_id}")
 
 if __name__ == '__main__':
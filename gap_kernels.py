@@ -0,0 +1,106 @@
+"""Numeric gap-detection kernels used by bitcoin-trader.py.
+
+They live in their own importable module because numba's on-disk cache
+(cache=True) has to re-import the defining module by name, and
+bitcoin-trader.py is usually loaded from its hyphenated path instead.
+
+Numba is optional; without it the kernels run as plain Python. Install with:
+    pip install numba
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except Exception:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        # support both the bare @njit form and @njit(cache=True, ...)
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
+
+
+# gap kinds
+GAP_NONE, GAP_UP, GAP_DOWN = 0, 1, 2
+
+# detector modes (see GapStrategy._detect_gap); unknown mode names use body rules
+MODE_STRICT, MODE_BODY, MODE_OPEN, MODE_B2DIR = 0, 1, 2, 3
+MODE_IDS = {'strict': MODE_STRICT, 'body': MODE_BODY, 'open': MODE_OPEN, 'b2dir': MODE_B2DIR}
+
+
+@njit(cache=True)
+def detect_gap_kernel(b1o, b1h, b1l, b1c, b2o, b2h, b2l, b2c, b3o, b3h, b3l, b3c, mode_id):
+    """Classify one 3-bar window (open/high/low/close of b1, b2, b3).
+
+    Returns (kind, gap_low, gap_high); the bounds are nan when kind is GAP_NONE.
+    """
+    if mode_id == MODE_B2DIR:
+        # b2 direction by body, then b3 entirely beyond b1's range
+        if b2o < b2c:
+            if b3l > b1h:
+                return GAP_UP, b1h, b3l
+        elif b2o > b2c:
+            if b3h < b1l:
+                return GAP_DOWN, b3h, b1l
+        return GAP_NONE, np.nan, np.nan
+
+    if mode_id == MODE_STRICT:
+        # b1/b2 full ranges must overlap
+        if b1h < b2l or b1l > b2h:
+            return GAP_NONE, np.nan, np.nan
+        if b3l > b2h:
+            return GAP_UP, b2h, b3l
+        if b3h < b2l:
+            return GAP_DOWN, b3h, b2l
+        return GAP_NONE, np.nan, np.nan
+
+    if mode_id == MODE_OPEN:
+        # b3 open against b2's full range
+        if b3o > b2h:
+            return GAP_UP, b2h, b3o
+        if b3o < b2l:
+            return GAP_DOWN, b3o, b2l
+        return GAP_NONE, np.nan, np.nan
+
+    # body mode: same as strict on candle bodies (min/max keep the first value on ties)
+    b1_lo = b1c if b1c < b1o else b1o
+    b1_hi = b1c if b1c > b1o else b1o
+    b2_lo = b2c if b2c < b2o else b2o
+    b2_hi = b2c if b2c > b2o else b2o
+    b3_lo = b3c if b3c < b3o else b3o
+    b3_hi = b3c if b3c > b3o else b3o
+    if b1_hi < b2_lo or b1_lo > b2_hi:
+        return GAP_NONE, np.nan, np.nan
+    if b3_lo > b2_hi:
+        return GAP_UP, b2_hi, b3_lo
+    if b3_hi < b2_lo:
+        return GAP_DOWN, b3_hi, b2_lo
+    return GAP_NONE, np.nan, np.nan
+
+
+@njit(cache=True)
+def scan_gaps_kernel(o, h, l, c, mode_id):
+    """detect_gap_kernel over every 3-bar window of float64 open/high/low/close arrays.
+
+    Returns (kind int8, gap_low, gap_high) arrays of length len(o) - 2; window i
+    covers bars i, i+1, i+2. One pass, no temporaries; only worth it when compiled.
+    """
+    n = max(o.shape[0] - 2, 0)
+    kind = np.zeros(n, dtype=np.int8)
+    gap_low = np.full(n, np.nan)
+    gap_high = np.full(n, np.nan)
+    for i in range(n):
+        k, lo, hi = detect_gap_kernel(o[i], h[i], l[i], c[i],
+                                      o[i + 1], h[i + 1], l[i + 1], c[i + 1],
+                                      o[i + 2], h[i + 2], l[i + 2], c[i + 2], mode_id)
+        if k != GAP_NONE:
+            kind[i] = k
+            gap_low[i] = lo
+            gap_high[i] = hi
+    return kind, gap_low, gap_high
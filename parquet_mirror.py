@@ -0,0 +1,65 @@
+"""Parquet mirrors of parsed CSV files, shared by bitcoin-trader.py and the backtesting scripts.
+
+`mirrored_read(path, parse, version)` returns `parse(path)` and saves the frame next
+to the CSV as `<path>.parquet`. The mirror's Parquet metadata records the CSV's
+(mtime_ns, size) as stat'ed *before* parsing, the caller's `version` tag and a digest
+of the parser's bytecode; the mirror is only served while all of them still match
+exactly. A CSV rewritten while it was being parsed, or a changed parser, therefore
+means a fresh parse instead of stale rows.
+
+Needs pyarrow:
+    pip install pyarrow
+
+Without it (or when the mirror cannot be written) the CSV is parsed every time.
+"""
+
+import hashlib
+import logging
+import marshal
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+# Parquet schema metadata key holding the signature the mirror was built from
+SIG_KEY = b'csv_mirror_sig'
+
+
+def _parser_digest(parse) -> str:
+    code = getattr(parse, '__code__', None)
+    if code is None:
+        return getattr(parse, '__qualname__', type(parse).__name__)
+    return hashlib.sha1(marshal.dumps((code.co_code, code.co_consts, code.co_names))).hexdigest()[:12]
+
+
+def mirrored_read(path, parse, version=1, compression='zstd'):
+    """`parse(path)`, through a Parquet mirror at `<path>.parquet` (see module docstring)."""
+    if pq is None:
+        return parse(path)
+    st = os.stat(path)
+    sig = f"{st.st_mtime_ns}:{st.st_size}:{version}:{_parser_digest(parse)}".encode()
+    pq_path = f"{path}.parquet"
+    try:
+        pf = pq.ParquetFile(pq_path)
+        if (pf.schema_arrow.metadata or {}).get(SIG_KEY) == sig:
+            return pf.read().to_pandas()
+    except Exception:
+        # no mirror yet, or an unreadable one (rewritten below)
+        pass
+
+    df = parse(path)
+    try:
+        table = pa.Table.from_pandas(df)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), SIG_KEY: sig})
+        # temp name + rename: readers never see a half-written mirror
+        tmp_path = pq_path + '.tmp'
+        pq.write_table(table, tmp_path, compression=compression)
+        os.replace(tmp_path, pq_path)
+    except Exception as e:
+        logger.debug(f"Could not write Parquet mirror {pq_path}: {e}")
+    return df
@@ -25,6 +25,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# value columns of the saved CSVs (after the time index) and their types, so
+# readers of those files (here and in bitcoin-trader.py) skip type inference
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+OHLCV_DTYPES = {col: 'float64' for col in OHLCV_COLUMNS}
+
 
 class PionexDownloader:
     """Downloads and manages Bars data from Pionex exchange."""
@@ -65,6 +70,9 @@ class PionexDownloader:
         self.symbol = symbol
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
+        # filename -> ((mtime_ns, size), frame last read from / written to it), so
+        # appending a few bars does not re-parse the whole history every time
+        self._frames = {}
         
     def get_bars(self, interval='4H', limit=500, start_time=None, end_time=None):
         """
@@ -120,7 +128,7 @@ class PionexDownloader:
             df['time'] = pd.to_datetime(df['time'], unit='ms')
             
             # Convert OHLCV to numeric
-            for col in ['open', 'high', 'low', 'close', 'volume']:
+            for col in OHLCV_COLUMNS:
                 df[col] = pd.to_numeric(df[col], errors='coerce')
                 
             # Set time as index
@@ -154,8 +162,8 @@ class PionexDownloader:
         
         try:
             if append and filename.exists():
-                # Load existing data
-                existing_df = pd.read_csv(filename, index_col=0, parse_dates=True)
+                # Load existing data (cached unless the file changed since we last saw it)
+                existing_df = self._load_existing(filename)
                 
                 # Combine and remove duplicates
                 combined_df = pd.concat([existing_df, df])
@@ -163,14 +171,34 @@ class PionexDownloader:
                 combined_df.sort_index(inplace=True)
                 
                 combined_df.to_csv(filename)
+                self._remember(filename, combined_df)
                 logger.info(f"Appended {len(df)} rows to {filename} (total: {len(combined_df)})")
             else:
                 df.to_csv(filename)
+                self._remember(filename, df)
                 logger.info(f"Saved {len(df)} rows to {filename}")
                 
         except Exception as e:
             logger.error(f"Error saving to CSV: {e}")
     
+    @staticmethod
+    def _file_sig(filename):
+        st = filename.stat()
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load_existing(self, filename):
+        """Return the frame stored in `filename`, re-parsing it only if it changed on disk."""
+        sig = self._file_sig(filename)
+        cached = self._frames.get(filename)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+        df = pd.read_csv(filename, index_col=0, parse_dates=True, dtype=OHLCV_DTYPES)
+        self._frames[filename] = (sig, df)
+        return df
+
+    def _remember(self, filename, df):
+        self._frames[filename] = (self._file_sig(filename), df)
+
     def download_latest(self, interval='4H', limit=10):
         """
         Download the latest Bars and append to CSV.
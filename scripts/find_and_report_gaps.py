@@ -83,9 +83,8 @@ for tf in timeframes:
         # Verbose: print the 3-bar window around the found time and detector output
         if args.verbose:
             try:
-                import pandas as pd
                 fname = Path(strategy.downloader.data_dir) / f"{strategy.symbol.lower()}_{tf.lower()}_pionex.csv"
-                df_full = pd.read_csv(fname, index_col=0, parse_dates=True).sort_index()
+                df_full = mod._load_ohlcv(fname).sort_index()
                 if found_time in df_full.index:
                     idx = df_full.index.get_loc(found_time)
                 else:
@@ -118,20 +117,8 @@ for tf in timeframes:
             except Exception as e:
                 print('Verbose: could not load window or run detector:', e)
 
-        # check whether gap already recorded (be robust to old/malformed CSV rows)
-        recorded = False
-        for r in manager._read_all():
-            r_tf = r.get('timeframe')
-            r_start = r.get('start_time') or r.get('start') or ''
-            # Try to parse stored start_time and compare to found_time
-            try:
-                from datetime import datetime
-                r_dt = datetime.fromisoformat(r_start) if r_start else None
-            except Exception:
-                r_dt = None
-            if r_tf == tf and r_dt is not None and r_dt == found_time:
-                recorded = True
-                break
+        # check whether gap already recorded (indexed lookup; tolerates old/malformed CSV rows)
+        recorded = manager.is_recorded(tf, found_time)
         if not recorded:
             # Prepare a preview message
             preview = f"Found gap {tf} {g['type']} {g['low']} - {g['high']} at {found_time.isoformat()}"
@@ -56,7 +56,8 @@ for i in range(cycles):
 # Send stop message
 dm.send_msg('🛑 Bitcoin gap monitor: short live test finished.', strat='bitcoin-trader', toPrint=True)
 
-# Print gaps summary
+# Print gaps summary (fold pending closures into the CSV first)
+strategy.gap_mgr.compact()
 gaps_path = Path('gaps/gaps.csv')
 if gaps_path.exists():
     print('\nGaps file contents (last 20 rows):')
@@ -12,6 +12,8 @@ import importlib.util
 import csv
 from datetime import datetime
 
+import numpy as np
+
 proj = Path('.').resolve()
 import sys
 sys.path.insert(0, str(proj))
@@ -36,19 +38,23 @@ manager_tmp = GapManager(csv_path=tmp_gaps)
 # scan all data files and detect gaps
 files = list(Path(args.data_dir).glob('*_pionex.csv'))
 count = 0
+detected = []
 for f in files:
     tf = f.name.split('_')[-2].upper() if len(f.name.split('_')) >= 3 else None
     if not tf:
         continue
-    import pandas as pd
-    df = pd.read_csv(f, index_col=0, parse_dates=True).sort_index()
-    for i in range(2, len(df)):
-        window = df.iloc[i-2:i+1]
-        det = strategy._detect_gap(window, mode=args.mode)
-        if det:
-            # add to manager_tmp using its data_dir context so the check is consistent
-            manager_tmp.add_gap(tf, det['start_time'], det['type'], det['gap_low'], det['gap_high'], data_dir=str(args.data_dir))
-            count += 1
+    df = mod._load_ohlcv(f).sort_index()
+    # every 3-bar window at once (same rules as strategy._detect_gap); window i ends at bar i + 2
+    ohlc = df[['open', 'high', 'low', 'close']].to_numpy(dtype=float)
+    kind, gap_low, gap_high = mod._scan_gaps(ohlc[:, 0], ohlc[:, 1], ohlc[:, 2], ohlc[:, 3], mode=args.mode)
+    for i in np.flatnonzero(kind):
+        gap_type = 'up' if kind[i] == mod.GAP_UP else 'down'
+        detected.append((tf, df.index[i + 2].to_pydatetime(), gap_type, float(gap_low[i]), float(gap_high[i])))
+        count += 1
+
+# add to manager_tmp in one batch, using its data_dir context so the check is consistent
+manager_tmp.add_gaps(detected, data_dir=str(args.data_dir))
+manager_tmp.close()
 
 print(f"Detected {count} candidate gaps across {len(files)} data files (mode={args.mode})")
 if args.apply:
@@ -57,6 +63,12 @@ if args.apply:
         bak = cur.parent / f"gaps.backup.rebuild.{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.csv"
         cur.rename(bak)
         print(f"Backed up existing gaps CSV to {bak}")
+    # pending closures refer to the old gap IDs; keep them with the backup
+    closures = cur.with_name(f"{cur.stem}_closures.csv")
+    if closures.exists():
+        closures_bak = closures.parent / f"gaps_closures.backup.rebuild.{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.csv"
+        closures.rename(closures_bak)
+        print(f"Backed up existing gap closures log to {closures_bak}")
     tmp_gaps.rename(cur)
     print(f"Replaced gaps CSV with rebuilt file ({count} gaps)")
 else:
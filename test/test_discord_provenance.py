@@ -19,7 +19,7 @@ def test_send_msg_provenance(monkeypatch):
             text = ''
         return Res()
 
-    monkeypatch.setattr(dm.requests, 'post', fake_post)
+    monkeypatch.setattr(dm._SESSION, 'post', fake_post)
 
     # Call send_msg with a known message
     res = dm.send_msg('unit-test message', strat='bitcoin-trader', toPrint=False, timeout=1)
@@ -31,3 +31,63 @@ def test_send_msg_provenance(monkeypatch):
     assert 'unit-test message' in content
     # Should include a provenance marker [src: ... pid: ... host: ...]
     assert '[src:' in content and 'pid:' in content and 'host:' in content
+    assert f'pid:{os.getpid()} host:{socket.gethostname()}]' in content
+
+    dm.send_msg('bare', strat='bitcoin-trader', include_provenance=False, timeout=1)
+    assert sent['json']['content'] == 'bare'
+
+
+def test_send_msg_waits_out_rate_limit(monkeypatch):
+    statuses = [429, 204]
+    sleeps = []
+
+    class Res:
+        def __init__(self, status_code):
+            self.status_code = status_code
+            self.text = ''
+            self.headers = {}
+
+        def json(self):
+            return {'retry_after': 0.25}
+
+    monkeypatch.setattr(dm._SESSION, 'post', lambda url, json=None, headers=None, timeout=None: Res(statuses.pop(0)))
+    monkeypatch.setattr(dm.time, 'sleep', sleeps.append)
+
+    assert dm.send_msg('rate limited', strat='bitcoin-trader', timeout=1) is True
+    assert sleeps == [0.25] and statuses == []
+
+
+def test_notify_partial_fill_sends_off_the_event_loop(monkeypatch):
+    import asyncio
+    import threading
+
+    calls = []
+    monkeypatch.setattr(dm, 'send_msg', lambda msg, strat=None: calls.append((msg, strat, threading.current_thread())))
+
+    asyncio.run(dm.notify_partial_fill('P1', 'SPY', 'straddle', 1, 2, 5.25, 1))
+
+    assert len(calls) == 1
+    msg, strat, thread = calls[0]
+    assert strat == 'auto-trader-pro'
+    assert 'Filled: 1/2 contracts @ $5.25' in msg
+    assert thread is not threading.main_thread()
+
+
+def test_send_msg_waits_for_empty_rate_limit_bucket(monkeypatch):
+    sleeps = []
+
+    class Res:
+        status_code = 204
+        text = ''
+        headers = {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset-After': '2.5'}
+
+    monkeypatch.setattr(dm, '_RATE_STATE', {})
+    monkeypatch.setattr(dm._SESSION, 'post', lambda url, json=None, headers=None, timeout=None: Res())
+    monkeypatch.setattr(dm.time, 'sleep', sleeps.append)
+    monkeypatch.setattr(dm.time, 'monotonic', lambda: 100.0)
+
+    assert dm.send_msg('first', strat='bitcoin-trader', timeout=1) is True
+    assert sleeps == []
+    # the bucket is empty until 102.5, so the next send waits it out before posting
+    assert dm.send_msg('second', strat='bitcoin-trader', timeout=1) is True
+    assert sleeps == [2.5]
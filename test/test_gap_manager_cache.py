@@ -0,0 +1,134 @@
+import importlib.util
+from pathlib import Path
+from datetime import datetime
+import csv
+
+# load module
+proj = Path('.').resolve()
+spec = importlib.util.spec_from_file_location('btmod', proj / 'bitcoin-trader.py')
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+GapManager = mod.GapManager
+
+
+def test_rows_cached_and_reloaded_after_external_change(tmp_path):
+    gaps_file = tmp_path / 'gaps.csv'
+    gm = GapManager(csv_path=gaps_file)
+
+    rec = gm.add_gap('60M', datetime.fromisoformat('2025-12-21T11:00:00'), 'up', 50100.0, 50200.0, data_dir=str(tmp_path))
+    assert rec.id == 'G00001'
+    rows = gm._read_all()
+    assert len(rows) == 1
+    # cached rows look exactly like rows parsed from the file
+    with open(gaps_file, newline='') as f:
+        assert list(csv.DictReader(f)) == rows
+
+    # another process appends a row -> the manager picks it up on next access
+    with open(gaps_file, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writerow(dict(rows[0], id='G00002', start_time='2025-12-21T12:00:00', gap_low='50300.0', gap_high='50400.0'))
+    assert [r['id'] for r in gm._read_all()] == ['G00001', 'G00002']
+    assert gm.is_recorded('60M', '2025-12-21T12:00:00')
+    assert gm.is_recorded('60M', datetime.fromisoformat('2025-12-21T12:00:00'))
+    assert not gm.is_recorded('4H', '2025-12-21T12:00:00')
+
+    rec3 = gm.add_gap('60M', datetime.fromisoformat('2025-12-21T13:00:00'), 'down', 50500.0, 50600.0, data_dir=str(tmp_path))
+    assert rec3.id == 'G00003'
+
+    gm.update_gap_closed('G00002', datetime.fromisoformat('2025-12-21T14:00:00'), 50300.0)
+    assert [g.id for g in gm.list_open_gaps()] == ['G00001', 'G00003']
+    # a fresh manager reading the file sees the same state
+    assert [g.id for g in GapManager(csv_path=gaps_file).list_open_gaps()] == ['G00001', 'G00003']
+
+
+def test_open_gap_view_tracks_changes_and_drives_monitor(tmp_path, monkeypatch):
+    gs = mod.GapStrategy()
+    gs.gap_mgr = GapManager(csv_path=tmp_path / 'gaps.csv')
+    gm = gs.gap_mgr
+    gm.add_gap('60M', datetime.fromisoformat('2025-12-21T11:00:00'), 'up', 50100.0, 50200.0, data_dir=str(tmp_path))
+    gm.add_gap('60M', datetime.fromisoformat('2025-12-21T12:00:00'), 'down', 50500.0, 50600.0, data_dir=str(tmp_path))
+    gm.add_gap('4H', datetime.fromisoformat('2025-12-21T12:00:00'), 'up', 50300.0, 50400.0, data_dir=str(tmp_path))
+
+    view = gm.open_gap_view()
+    assert view.ids == ['G00001', 'G00002', 'G00003']
+    assert list(view.gap_lows) == [50100.0, 50500.0, 50300.0]
+    assert list(view.timeframes) == ['60M', '60M', '4H']
+    assert gm.open_gap_view('4H').ids == ['G00003']
+    assert gm.open_gap_view('1D').ids == []
+    assert gm.open_gap_view('60M', 'down').ids == ['G00002']
+
+    sent = []
+    monkeypatch.setattr(mod, 'send_msg', lambda msg, strat=None: sent.append(msg))
+    # low reaches the 60M up gap and the 4H up gap (other timeframe); high misses the down gap
+    gs._monitor_gaps_with_bar('60M', 50050.0, 50400.0)
+    assert sent == ['Gap closed G00001 60M up gap filled at 50050.0']
+    assert gm.open_gap_view().ids == ['G00002', 'G00003']
+
+    gs._monitor_gaps_with_bar('60M', 50350.0, 50600.0)
+    assert sent[-1] == 'Gap closed G00002 60M down gap filled at 50600.0'
+    assert [g.id for g in gm.list_open_gaps()] == ['G00003']
+    assert gm.list_open_gaps('60M') == []
+    assert [g.gap_low for g in gm.list_open_gaps('4H')] == [50300.0]
+
+
+def test_close_gaps_appends_closures_and_compact_folds_them(tmp_path):
+    gm = GapManager(csv_path=tmp_path / 'gaps.csv')
+    for h in (11, 12, 13):
+        gm.add_gap('60M', datetime(2025, 12, 21, h), 'up', 50000.0 + h, 50100.0 + h, data_dir=str(tmp_path))
+    before = (tmp_path / 'gaps.csv').read_text()
+    gm.close_gaps({'G00001': 49990.0, 'G00003': 49980.0, 'G99999': 1.0}, datetime(2025, 12, 21, 14))
+    # closures only go to the side-log
+    assert (tmp_path / 'gaps.csv').read_text() == before
+    assert len((tmp_path / 'gaps_closures.csv').read_text().splitlines()) == 3
+    rows = GapManager(csv_path=tmp_path / 'gaps.csv')._read_all()
+    assert [r['status'] for r in rows] == ['closed', 'open', 'closed']
+    assert rows[2]['close_price'] == '49980.00000000'
+    assert gm.open_gap_view().ids == ['G00002']
+
+    gm.compact()
+    assert not (tmp_path / 'gaps_closures.csv').exists()
+    with open(tmp_path / 'gaps.csv', newline='') as f:
+        assert list(csv.DictReader(f)) == rows
+    gm.add_gap('60M', datetime(2025, 12, 21, 15), 'up', 50015.0, 50115.0, data_dir=str(tmp_path))
+    assert GapManager(csv_path=tmp_path / 'gaps.csv').open_gap_view().ids == ['G00002', 'G00004']
+
+
+def test_add_gaps_assigns_ids_in_order_and_skips_rejected(tmp_path):
+    gm = GapManager(csv_path=tmp_path / 'gaps.csv')
+    gm.add_gap('60M', datetime(2025, 12, 21, 10), 'up', 50000.0, 50100.0, data_dir=str(tmp_path))
+    recs = gm.add_gaps([
+        ('60M', datetime(2025, 12, 21, 11), 'up', 50100.0, 50200.0),
+        ('4H', datetime(2025, 12, 21, 12), 'down', -1.0, 50300.0),
+        ('4H', datetime(2025, 12, 21, 16), 'down', 50300.0, 50400.0),
+    ], data_dir=str(tmp_path))
+    assert [r.id if r else None for r in recs] == ['G00002', None, 'G00003']
+    with open(tmp_path / 'gaps.csv', newline='') as f:
+        assert list(csv.DictReader(f)) == gm._read_all()
+    assert gm.is_recorded('4H', '2025-12-21T16:00:00')
+
+
+def test_add_gap_from_several_threads_gets_unique_ids(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    gm = GapManager(csv_path=tmp_path / 'gaps.csv')
+
+    def add(h):
+        return gm.add_gap('60M', datetime(2025, 12, 21, h), 'up', 50000.0 + h, 50100.0 + h, data_dir=str(tmp_path)).id
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        ids = list(pool.map(add, range(20)))
+    assert sorted(ids) == [f"G{i:05d}" for i in range(1, 21)]
+    with open(tmp_path / 'gaps.csv', newline='') as f:
+        assert list(csv.DictReader(f)) == gm._read_all()
+
+
+def test_ids_not_reused_after_sanitize_removes_rows(tmp_path):
+    gm = GapManager(csv_path=tmp_path / 'gaps.csv')
+    for h in (11, 12):
+        gm.add_gap('60M', datetime(2025, 12, 21, h), 'up', 50000.0 + h, 50100.0 + h, data_dir=str(tmp_path))
+    # an implausible row written by something else, with the highest id
+    rows = gm._read_all()
+    with open(tmp_path / 'gaps.csv', 'a', newline='') as f:
+        csv.DictWriter(f, fieldnames=list(rows[0].keys())).writerow(dict(rows[0], id='G00003', gap_low='5.0', gap_high='6.0'))
+    assert gm.sanitize_gaps(data_dir=str(tmp_path)) == 1
+    rec = gm.add_gap('60M', datetime(2025, 12, 21, 13), 'up', 50013.0, 50113.0, data_dir=str(tmp_path))
+    assert rec.id == 'G00004'
@@ -0,0 +1,80 @@
+import importlib.util
+from pathlib import Path
+
+# load module
+proj = Path('.').resolve()
+spec = importlib.util.spec_from_file_location('btmod', proj / 'bitcoin-trader.py')
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+
+
+def test_notifier_sends_synchronously_until_started(monkeypatch):
+    sent = []
+    monkeypatch.setattr(mod, 'send_msg', lambda msg, strat=None: sent.append((msg, strat)))
+    n = mod.Notifier()
+    n.send('hello')
+    assert sent == [('hello', 'bitcoin-trader')]
+
+
+def test_notifier_worker_coalesces_queued_messages(monkeypatch):
+    sent, sessions = [], set()
+
+    def fake_send_msg(msg, strat=None, session=None):
+        sent.append(msg)
+        sessions.add(session)
+
+    monkeypatch.setattr(mod, 'send_msg', fake_send_msg)
+    n = mod.Notifier(max_len=12)
+    # queue before the worker runs, so everything is pending at once
+    for text in ('a', 'bb', 'ccc', 'dddddddd'):
+        n._q.put_nowait(text)
+    n.start()
+    n.stop()
+    assert sent == ['a\nbb\nccc', 'dddddddd']
+    assert n._thread is None
+    # both posts went through the worker's one session
+    assert len(sessions) == 1 and None not in sessions
+
+
+def test_notifier_coalesces_messages_sent_within_linger(monkeypatch):
+    sent = []
+    monkeypatch.setattr(mod, 'send_msg', lambda msg, strat=None, session=None: sent.append(msg))
+    n = mod.Notifier(linger=0.5)
+    n.start()
+    n.send('first')
+    n.send('second')
+    n.stop()
+    assert sent == ['first\nsecond']
+
+
+def test_notifier_stop_honours_timeout_with_full_queue_and_slow_post(monkeypatch):
+    import threading
+    import time
+
+    release = threading.Event()
+    closed = []
+
+    class Session:
+        def close(self):
+            closed.append(True)
+
+    def slow_send_msg(msg, strat=None, session=None):
+        # a post stuck in a long rate-limit back-off
+        release.wait(5)
+
+    monkeypatch.setattr(mod, 'send_msg', slow_send_msg)
+    monkeypatch.setattr(mod, 'new_session', Session)
+    n = mod.Notifier(max_pending=2, linger=0)
+    n.start()
+    n.send('in flight')
+    time.sleep(0.1)
+    n.send('queued 1')
+    n.send('queued 2')
+
+    t0 = time.monotonic()
+    n.stop(timeout=0.3)
+    assert time.monotonic() - t0 < 1.0
+    assert n._thread is None
+    # the worker still owns its session until it finishes posting
+    assert closed == []
+    release.set()
@@ -2,6 +2,7 @@ import importlib.util
 from pathlib import Path
 from datetime import datetime, timedelta
 import pandas as pd
+import os
 import sys
 
 # dynamic import
@@ -69,10 +70,50 @@ def test_process_interval_calls_download_and_sends_summary(tmp_path, monkeypatch
     gs.process_interval('60M')
 
     assert called['download'] is True
-    # should have sent at least two messages: one immediate gap found and one summary
-    assert len(called['send_msgs']) >= 2
+    # gap found and summary go out together as a single message
+    assert len(called['send_msgs']) == 1
+    assert called['send_msgs'][0].startswith('Gap found ')
     summary_msgs = [m for m in called['send_msgs'] if 'gaps in the last' in m or 'No gaps found' in m]
     assert len(summary_msgs) == 1
     assert '1 gaps' in summary_msgs[0] or '1 gap' in summary_msgs[0] or '1 gaps' in summary_msgs[0]
     # gap details should be in the summary message
-    assert 'low=' in summary_msgs[0] and 'high=' in summary_msgs[0]
\ No newline at end of file
+    assert 'low=' in summary_msgs[0] and 'high=' in summary_msgs[0]
+
+def test_process_interval_skips_when_csv_unchanged(tmp_path, monkeypatch):
+    csv_file = tmp_path / 'btc_usdt_60m_pionex.csv'
+    now = datetime(2025, 12, 21, 12, 0)
+    make_csv(csv_file, now)
+
+    gs = GapStrategy(symbol='BTC_USDT', data_dir=str(tmp_path), recent_bars=5, detector_mode='strict')
+    gs.gap_mgr = mod.GapManager(csv_path=tmp_path / 'gaps_test.csv')
+
+    calls = {'get_bars': 0, 'send_msgs': []}
+    monkeypatch.setattr(gs.downloader, 'download_latest', lambda interval='60M', limit=48: None)
+
+    def fake_get_bars(interval='60M', limit=3, start_time=None, end_time=None):
+        calls['get_bars'] += 1
+        return pd.read_csv(csv_file, index_col=0, parse_dates=True).sort_index().tail(3)
+
+    monkeypatch.setattr(gs.downloader, 'get_bars', fake_get_bars)
+    monkeypatch.setattr(mod, 'send_msg', lambda msg, strat=None: calls['send_msgs'].append(msg))
+
+    gs.process_interval('60M')
+    assert calls['get_bars'] == 1 and len(calls['send_msgs']) == 1
+
+    # nothing new downloaded -> no detection, no messages
+    gs.process_interval('60M')
+    assert calls['get_bars'] == 1 and len(calls['send_msgs']) == 1
+
+    # a new bar arrives -> processed again
+    make_csv(csv_file, now + timedelta(hours=1))
+    st = csv_file.stat()
+    os.utime(csv_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    gs.process_interval('60M')
+    assert calls['get_bars'] == 2 and len(calls['send_msgs']) == 2
+
+    # the CSV is rewritten but its newest bar is the same -> fetched, nothing re-sent
+    make_csv(csv_file, now + timedelta(hours=1))
+    st = csv_file.stat()
+    os.utime(csv_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    gs.process_interval('60M')
+    assert calls['get_bars'] == 3 and len(calls['send_msgs']) == 2
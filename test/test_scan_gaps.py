@@ -0,0 +1,35 @@
+import importlib.util
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+# load module
+proj = Path('.').resolve()
+spec = importlib.util.spec_from_file_location('btmod', proj / 'bitcoin-trader.py')
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+GapStrategy = mod.GapStrategy
+
+
+@pytest.mark.parametrize('min_bars', [10**9, 0], ids=['numpy', 'kernel'])
+@pytest.mark.parametrize('mode', ['strict', 'body', 'open', 'b2dir'])
+def test_scan_gaps_matches_detect_gap(mode, min_bars, monkeypatch):
+    monkeypatch.setattr(mod, 'NUMBA_MIN_BARS', min_bars)
+    # small integer prices so ties and every branch of each mode are exercised
+    rng = np.random.default_rng(0)
+    vals = rng.integers(0, 6, size=(400, 4)).astype(float)
+    df = pd.DataFrame(vals, columns=['open', 'high', 'low', 'close'],
+                      index=pd.date_range('2025-01-01', periods=len(vals), freq='60min'))
+
+    gs = GapStrategy()
+    expected = []
+    for i in range(2, len(df)):
+        res = gs._detect_gap(df.iloc[i-2:i+1], mode=mode)
+        if res is not None:
+            expected.append((i - 2, res['type'], res['gap_low'], res['gap_high']))
+
+    kind, gap_low, gap_high = mod._scan_gaps(vals[:, 0], vals[:, 1], vals[:, 2], vals[:, 3], mode=mode)
+    got = [(i, 'up' if kind[i] == mod.GAP_UP else 'down', gap_low[i], gap_high[i]) for i in np.flatnonzero(kind)]
+    assert expected
+    assert got == expected
@@ -0,0 +1,95 @@
+import importlib.util
+import io
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+# load module
+proj = Path('.').resolve()
+spec = importlib.util.spec_from_file_location('btmod', proj / 'bitcoin-trader.py')
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+
+
+@pytest.mark.parametrize('chunk_size', [7, 64, 64 * 1024])
+@pytest.mark.parametrize('n', [0, 1, 3, 15, 50, 80])
+def test_tail_csv_matches_full_read(tmp_path, n, chunk_size):
+    idx = pd.date_range('2025-01-01', periods=50, freq='60min', name='time')
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.uniform(100, 200, size=(50, 5)), index=idx, columns=['open', 'high', 'low', 'close', 'volume'])
+    path = tmp_path / 'btc_usdt_60m_pionex.csv'
+    df.to_csv(path)
+
+    tail = mod._read_ohlcv_csv(io.BytesIO(mod._tail_csv(path, n, chunk_size=chunk_size)))
+    full = mod._read_ohlcv_csv(path)
+    expected = full.tail(n) if n else full.iloc[:0]
+    pd.testing.assert_frame_equal(tail, expected, check_index_type=False, check_dtype=n > 0)
+
+    # a missing trailing newline must not drop the last row
+    path.write_bytes(path.read_bytes().rstrip(b'\n'))
+    tail = mod._read_ohlcv_csv(io.BytesIO(mod._tail_csv(path, n, chunk_size=chunk_size)))
+    assert len(tail) == min(n, 50)
+    if n:
+        assert tail.index[-1] == idx[-1]
+
+
+@pytest.mark.skipif(mod.pa is None, reason='needs pyarrow')
+def test_load_ohlcv_uses_parquet_mirror_until_csv_changes(tmp_path):
+    idx = pd.date_range('2025-01-01', periods=5, freq='60min', name='time')
+    df = pd.DataFrame(np.arange(25, dtype=float).reshape(5, 5), index=idx, columns=['open', 'high', 'low', 'close', 'volume'])
+    path = tmp_path / 'btc_usdt_60m_pionex.csv'
+    df.to_csv(path)
+
+    first = mod._load_ohlcv(path)
+    pd.testing.assert_frame_equal(first, mod._read_ohlcv_csv(path))
+    mirror = Path(f"{path}.parquet")
+    assert mirror.exists()
+    pd.testing.assert_frame_equal(mod._load_ohlcv(path), first)
+
+    # a rewritten CSV makes the mirror stale, even when its mtime goes backwards
+    df.iloc[:3].to_csv(path)
+    st = mirror.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - 1_000_000_000))
+    assert len(mod._load_ohlcv(path)) == 3
+    assert len(pd.read_parquet(mirror)) == 3
+
+
+@pytest.mark.skipif(mod.pa is None, reason='needs pyarrow')
+def test_load_ohlcv_mirror_not_trusted_when_csv_changes_during_parse(tmp_path, monkeypatch):
+    idx = pd.date_range('2025-01-01', periods=6, freq='60min', name='time')
+    df = pd.DataFrame(np.arange(30, dtype=float).reshape(6, 5), index=idx, columns=['open', 'high', 'low', 'close', 'volume'])
+    path = tmp_path / 'btc_usdt_60m_pionex.csv'
+    df.iloc[:5].to_csv(path)
+
+    read_csv = mod._read_ohlcv_csv
+    rewrites = [df]
+
+    def read_then_rewrite(p):
+        parsed = read_csv(p)
+        # another process (e.g. the downloader) rewrites the CSV mid-parse
+        if rewrites:
+            rewrites.pop().to_csv(path)
+        return parsed
+
+    monkeypatch.setattr(mod, '_read_ohlcv_csv', read_then_rewrite)
+    assert len(mod._load_ohlcv(path)) == 5
+    assert len(mod._load_ohlcv(path)) == 6
+    assert len(mod._load_ohlcv(path)) == 6
+
+
+def test_price_envelope_matches_pandas_and_tracks_changes(tmp_path):
+    idx = pd.date_range('2025-01-01', periods=40, freq='60min', name='time')
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame(rng.uniform(100, 200, size=(40, 5)), index=idx, columns=['open', 'high', 'low', 'close', 'volume'])
+    path = tmp_path / 'btc_usdt_60m_pionex.csv'
+    df.to_csv(path)
+    expected = pd.read_csv(path, index_col=0)
+    assert mod._price_envelope(path) == (expected['low'].min(), expected['high'].max())
+
+    df.iloc[:10].to_csv(path)
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    expected = pd.read_csv(path, index_col=0)
+    assert mod._price_envelope(path) == (expected['low'].min(), expected['high'].max())
@@ -0,0 +1,99 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+# import by its real name from backtesting/ (its helpers are imported flat from there),
+# so numba's on-disk cache can re-import the module that defines the kernels
+proj = Path('.').resolve()
+sys.path.insert(0, str(proj / 'backtesting'))
+import vectorbt_backtest as mod
+
+KERNELS = pytest.mark.parametrize('simulate', [mod._simulate, mod._simulate_numpy], ids=['kernel', 'numpy'])
+ENTRY_MODES = pytest.mark.parametrize('use_market_next', [False, True], ids=['stop', 'market_next'])
+
+
+def _random_inputs(rng, n):
+    # small integer steps so ties (TP and SL on one bar, stop == high) come up often
+    c = 100 + np.cumsum(rng.integers(-3, 4, n)).astype(float)
+    o = np.concatenate(([c[0]], c[:-1]))
+    h = np.maximum(o, c) + rng.integers(0, 3, n)
+    l = np.minimum(o, c) - rng.integers(0, 3, n)
+    sig_idx = np.sort(rng.choice(np.arange(3, n), size=(n - 3) // 4, replace=False)).astype(np.int64)
+    # same level choice as _run_sim_ohlc: stop at bar3 high, TP at bar1 low, SL at bar3 low
+    return o, h, l, sig_idx, h[sig_idx - 1], l[sig_idx - 3], l[sig_idx - 1]
+
+
+def _assert_same(a, b):
+    assert len(a) == len(b) == 6
+    for x, y in zip(a, b):
+        assert x.dtype == y.dtype
+        np.testing.assert_array_equal(x, y)
+
+
+@ENTRY_MODES
+@pytest.mark.parametrize('seed', range(20))
+def test_numpy_simulation_matches_kernel(seed, use_market_next):
+    rng = np.random.default_rng(seed)
+    args = _random_inputs(rng, int(rng.integers(8, 300)))
+    _assert_same(mod._simulate(*args, use_market_next), mod._simulate_numpy(*args, use_market_next))
+
+
+def _flat_bars(n):
+    o = np.full(n, 100.0)
+    return o, o + 1, o - 1
+
+
+@KERNELS
+@ENTRY_MODES
+def test_signal_on_last_bar_never_fills(simulate, use_market_next):
+    o, h, l = _flat_bars(6)
+    sig_idx = np.array([5], np.int64)
+    taken, entry_idx, exit_idx, entry_price, exit_price, reason = simulate(
+        o, h, l, sig_idx, np.array([100.5]), np.array([110.0]), np.array([90.0]), use_market_next)
+    assert list(taken) == [5]
+    assert list(entry_idx) == [-1] and list(exit_idx) == [-1]
+    assert np.isnan(entry_price).all() and np.isnan(exit_price).all()
+    assert list(reason) == [mod.REASON_NO_FILL]
+
+
+@KERNELS
+def test_unfilled_stop_blocks_later_signals(simulate):
+    o, h, l = _flat_bars(10)
+    sig_idx = np.array([3, 6], np.int64)
+    # the first stop sits above every high, so it stays pending to the end
+    taken, entry_idx, exit_idx, _, _, reason = simulate(
+        o, h, l, sig_idx, np.array([200.0, 100.5]), np.array([110.0, 110.0]), np.array([90.0, 90.0]), False)
+    assert list(taken) == [3]
+    assert list(entry_idx) == [-1] and list(exit_idx) == [-1]
+    assert list(reason) == [mod.REASON_NO_FILL]
+
+
+@KERNELS
+@ENTRY_MODES
+def test_position_open_at_end_of_data(simulate, use_market_next):
+    o, h, l = _flat_bars(10)
+    sig_idx = np.array([3, 6], np.int64)
+    # fills on bar 4 (stop 100.5 <= high, or market open), TP/SL out of reach
+    taken, entry_idx, exit_idx, entry_price, exit_price, reason = simulate(
+        o, h, l, sig_idx, np.array([100.5, 100.5]), np.array([150.0, 150.0]), np.array([50.0, 50.0]), use_market_next)
+    assert list(taken) == [3]
+    assert list(entry_idx) == [4]
+    assert list(entry_price) == [100.0 if use_market_next else 100.5]
+    assert list(exit_idx) == [-1] and np.isnan(exit_price).all()
+    assert list(reason) == [mod.REASON_OPEN]
+
+
+@KERNELS
+@ENTRY_MODES
+def test_exit_on_tp_then_next_signal(simulate, use_market_next):
+    o, h, l = _flat_bars(12)
+    h[6] = 105.0  # TP bar for the first trade
+    sig_idx = np.array([3, 5, 8], np.int64)
+    taken, entry_idx, exit_idx, _, exit_price, reason = simulate(
+        o, h, l, sig_idx, np.full(3, 100.5), np.full(3, 104.0), np.full(3, 50.0), use_market_next)
+    # market-next entries resume scanning after the signal bar, stop entries after the exit bar
+    expected_taken = [3, 5] if use_market_next else [3, 8]
+    assert list(taken) == expected_taken
+    assert entry_idx[0] == 4 and exit_idx[0] == 6
+    assert exit_price[0] == 104.0 and reason[0] == mod.REASON_TP